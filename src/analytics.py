@@ -0,0 +1,379 @@
+import os
+import struct
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import compress
+from operator import lt
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from config import ANALYTICS_PATH, DATA_PATH
+from puzzle_catalog import PuzzleCatalog
+from puzzle_pack import REBUS_CELL, PuzzlePack, encode_grid
+from puzzle_reader import VOID_CELL, Puzzle, date_key, key_date, puzzle_files
+
+ANALYTICS_MAGIC: bytes = b"XWAN"
+ANALYTICS_VERSION: int = 1
+
+# magic, version, source signature (file count or size, newest mtime), puzzle count, answer count, answer width
+ANALYTICS_HEADER: struct.Struct = struct.Struct("<4sHQQIIH")
+
+DAYS: tuple[str, ...] = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+UNKNOWN_DAY: int = len(DAYS)
+LETTERS: bytes = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ACROSS: int = 0
+DOWN: int = 1
+
+VOID: int = ord(VOID_CELL)
+# answers are padded with void cells, which never occur inside a word, so padded rows compare like the answers,
+# and each row ends in a newline so the matrix splits into rows in one call
+PAD: bytes = VOID_CELL.encode("ascii")
+ROW_END: bytes = b"\n"
+
+
+class DayReport(NamedTuple):
+    day: str
+    puzzles: int
+    cells: float
+    block_density: float
+    word_length: float
+    long_words: float
+    fresh_answers: float
+    rebus_cells: float
+
+
+class ReuseReport(NamedTuple):
+    answer: str
+    uses: int
+    first: str
+    last: str
+
+
+def _source_signature(source: Path) -> tuple[int, int]:
+    if source.is_file():
+        stat: os.stat_result = source.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    mtimes: list[int] = [day.stat().st_mtime_ns for day in puzzle_files(source)]
+    return len(mtimes), max(mtimes, default=0)
+
+
+def open_catalog(source: Path) -> PuzzleCatalog:
+    if source.is_file():
+        return PuzzleCatalog.from_pack(PuzzlePack(source))
+
+    return PuzzleCatalog.from_directory(source)
+
+
+class CorpusColumns:
+    # one entry per puzzle in date order, then one row per answer in puzzle order,
+    # so every aggregate is a slice, count or counter over a flat column
+
+    @staticmethod
+    def open(source: Path, cache_path: Optional[Path] = None) -> "CorpusColumns":
+        signature: tuple[int, int] = _source_signature(source)
+        if cache_path is not None:
+            cached: Optional[CorpusColumns] = CorpusColumns.load(cache_path, signature)
+            if cached is not None:
+                return cached
+
+        columns: CorpusColumns = CorpusColumns.build(open_catalog(source), signature)
+        if cache_path is not None:
+            columns.save(cache_path)
+
+        return columns
+
+    @staticmethod
+    def build(catalog: PuzzleCatalog, signature: tuple[int, int] = (0, 0)) -> "CorpusColumns":
+        columns: CorpusColumns = CorpusColumns(signature)
+        cells: list[bytes] = []
+        entries: list[bytes] = []
+        for position in range(len(catalog)):
+            puzzle: Puzzle = catalog.load(position)
+            grid, _, _ = encode_grid(puzzle.answers.completed)
+            columns.date_keys.append(date_key(puzzle.date))
+            columns.days.append(DAYS.index(catalog[position].dow) if catalog[position].dow in DAYS else UNKNOWN_DAY)
+            columns.rows.append(puzzle.rows)
+            columns.cols.append(puzzle.cols)
+            columns.cell_offsets.append(columns.cell_offsets[-1] + len(grid))
+            cells.append(grid)
+
+            for direction, spans in ((ACROSS, puzzle.clues.by_index.across_cells),
+                                     (DOWN, puzzle.clues.by_index.down_cells)):
+                for span in spans.values():
+                    entries.append(grid[span.start:span.stop:span.step])
+                    columns.answer_puzzles.append(position)
+                    columns.answer_directions.append(direction)
+                    columns.answer_lengths.append(len(span))
+
+        columns.cells = b"".join(cells)
+        columns.width = max(columns.answer_lengths, default=0)
+        columns.answers = b"".join(entry.ljust(columns.width, PAD) + ROW_END for entry in entries)
+        return columns
+
+    @staticmethod
+    def load(cache_path: Path, signature: tuple[int, int]) -> Optional["CorpusColumns"]:
+        try:
+            data: bytes = cache_path.read_bytes()
+            magic, version, size, mtime, puzzles, answers, width = ANALYTICS_HEADER.unpack_from(data, 0)
+
+        except (OSError, struct.error):
+            return None
+
+        if magic != ANALYTICS_MAGIC or version != ANALYTICS_VERSION or (size, mtime) != signature:
+            return None
+
+        columns: CorpusColumns = CorpusColumns(signature)
+        columns.width = width
+        offset: int = ANALYTICS_HEADER.size
+
+        def take(column: array, count: int) -> array:
+            nonlocal offset
+            end: int = offset + count * column.itemsize
+            column.frombytes(data[offset:end])
+            offset = end
+            return column
+
+        try:
+            columns.date_keys = take(array("I"), puzzles)
+            columns.days = take(array("B"), puzzles)
+            columns.rows = take(array("H"), puzzles)
+            columns.cols = take(array("H"), puzzles)
+            columns.cell_offsets = take(array("I"), puzzles + 1)
+            columns.answer_puzzles = take(array("I"), answers)
+            columns.answer_directions = take(array("B"), answers)
+            columns.answer_lengths = take(array("B"), answers)
+
+        except (ValueError, IndexError):
+            # a torn cache leaves a column short of whole items
+            return None
+
+        columns.cells = data[offset:offset + columns.cell_offsets[-1]]
+        offset += columns.cell_offsets[-1]
+        columns.answers = data[offset:]
+        if len(columns.answers) != answers * (width + 1):
+            return None
+
+        return columns
+
+    def __init__(self, signature: tuple[int, int]) -> None:
+        self.signature: tuple[int, int] = signature
+        self.date_keys: array = array("I")
+        self.days: array = array("B")
+        self.rows: array = array("H")
+        self.cols: array = array("H")
+        self.cell_offsets: array = array("I", [0])
+        self.cells: bytes = b""
+        self.answer_puzzles: array = array("I")
+        self.answer_directions: array = array("B")
+        self.answer_lengths: array = array("B")
+        self.answers: bytes = b""
+        self.width: int = 0
+        self._rows: Optional[list[bytes]] = None
+
+    def __len__(self) -> int:
+        return len(self.date_keys)
+
+    def save(self, cache_path: Path) -> None:
+        temporary: Path = cache_path.with_name(cache_path.name + ".tmp")
+        with open(temporary.absolute(), "wb") as cache_file:
+            cache_file.write(ANALYTICS_HEADER.pack(ANALYTICS_MAGIC, ANALYTICS_VERSION, *self.signature, len(self),
+                                                   len(self.answer_lengths), self.width))
+            for column in (self.date_keys, self.days, self.rows, self.cols, self.cell_offsets,
+                           self.answer_puzzles, self.answer_directions, self.answer_lengths):
+                cache_file.write(column.tobytes())
+
+            cache_file.write(self.cells)
+            cache_file.write(self.answers)
+
+        os.replace(temporary, cache_path)
+
+    def answer_rows(self) -> list[bytes]:
+        if self._rows is None:
+            self._rows = self.answers.splitlines()
+
+        return self._rows
+
+    def _answer_starts(self) -> list[int]:
+        return [bisect_left(self.answer_puzzles, position) for position in range(len(self) + 1)]
+
+    def letter_frequency(self) -> list[dict[str, int]]:
+        # a strided slice of the answer matrix is every answer's letter at one position
+        frequencies: list[dict[str, int]] = []
+        for position in range(self.width):
+            column: bytes = self.answers[position::self.width + 1]
+            frequencies.append({chr(letter): column.count(letter) for letter in LETTERS})
+
+        return frequencies
+
+    def block_density(self) -> array:
+        offsets: array = self.cell_offsets
+        return array("d", (
+            self.cells.count(VOID, offsets[position], offsets[position + 1]) / (offsets[position + 1] - offsets[position])
+            for position in range(len(self))
+        ))
+
+    def word_lengths(self, direction: Optional[int] = None) -> Counter[int]:
+        if direction is None:
+            return Counter(self.answer_lengths)
+
+        return Counter(compress(self.answer_lengths, map(direction.__eq__, self.answer_directions)))
+
+    def answer_reuse(self, limit: int = 20) -> list[ReuseReport]:
+        rows: list[bytes] = self.answer_rows()
+        # later pairs overwrite earlier ones, so reversing keeps the first puzzle of each answer
+        first: dict[bytes, int] = dict(zip(reversed(rows), reversed(self.answer_puzzles)))
+        last: dict[bytes, int] = dict(zip(rows, self.answer_puzzles))
+        return [
+            ReuseReport(row.rstrip(PAD).decode("ascii"), uses, key_date(self.date_keys[first[row]]),
+                        key_date(self.date_keys[last[row]]))
+            for row, uses in Counter(rows).most_common(limit)
+        ]
+
+    def repeats(self) -> bytes:
+        # one flag per answer, set when an earlier puzzle already used it
+        rows: list[bytes] = self.answer_rows()
+        first: dict[bytes, int] = dict(zip(reversed(rows), reversed(self.answer_puzzles)))
+        return bytes(map(lt, map(first.__getitem__, rows), self.answer_puzzles))
+
+    def reuse_by_month(self) -> dict[int, tuple[int, int]]:
+        repeats: bytes = self.repeats()
+        starts: list[int] = self._answer_starts()
+        months: dict[int, tuple[int, int]] = {}
+        for month in sorted({key // 100 for key in self.date_keys}):
+            first: int = starts[bisect_left(self.date_keys, month * 100)]
+            end: int = starts[bisect_left(self.date_keys, month * 100 + 100)]
+            months[month] = (end - first, repeats.count(1, first, end))
+
+        return months
+
+    def day_report(self) -> list[DayReport]:
+        densities: array = self.block_density()
+        uses: Counter[bytes] = Counter(self.answer_rows())
+        # an answer no other puzzle in the corpus uses is a rough proxy for a harder fill
+        fresh: bytes = bytes(map((1).__eq__, map(uses.__getitem__, self.answer_rows())))
+        long_words: bytes = bytes(map((8).__le__, self.answer_lengths))
+        starts: list[int] = self._answer_starts()
+
+        # answers of one puzzle are contiguous, so each sum is a slice or a count over its range
+        totals: dict[int, list[float]] = {}
+        for position, day in enumerate(self.days):
+            first, end = starts[position], starts[position + 1]
+            total: list[float] = totals.setdefault(day, [0.0] * 8)
+            total[0] += 1
+            total[1] += self.rows[position] * self.cols[position]
+            total[2] += densities[position]
+            total[3] += end - first
+            total[4] += sum(self.answer_lengths[first:end])
+            total[5] += long_words.count(1, first, end)
+            total[6] += fresh.count(1, first, end)
+            total[7] += self.cells.count(REBUS_CELL, self.cell_offsets[position], self.cell_offsets[position + 1])
+
+        reports: list[DayReport] = []
+        for day in sorted(totals):
+            puzzles, cells, density, answers, lengths, long_count, fresh_count, rebus = totals[day]
+            answers = max(answers, 1)
+            reports.append(DayReport(
+                DAYS[day] if day < len(DAYS) else "unknown",
+                int(puzzles),
+                cells / puzzles,
+                density / puzzles,
+                lengths / answers,
+                long_count / answers,
+                fresh_count / answers,
+                rebus / puzzles,
+            ))
+
+        return reports
+
+
+def _letters_report(columns: CorpusColumns, top: int) -> list[str]:
+    lines: list[str] = ["letter frequency by position in the answer"]
+    for position, frequency in enumerate(columns.letter_frequency(), 1):
+        total: int = sum(frequency.values())
+        ranked: list[tuple[str, int]] = sorted(((letter, count) for letter, count in frequency.items() if count),
+                                               key=lambda item: -item[1])[:top]
+        lines.append(f"{position:>3} {total:>7} " + " ".join(f"{letter}{count / total:>5.1%}" for letter, count in ranked))
+
+    return lines
+
+
+def _blocks_report(columns: CorpusColumns, top: int) -> list[str]:
+    densities: array = columns.block_density()
+    ranked: list[int] = sorted(range(len(columns)), key=lambda position: -densities[position])[:top]
+    lines: list[str] = [f"block density mean {sum(densities) / max(len(densities), 1):.1%}, densest:"]
+    lines.extend(f"    {key_date(columns.date_keys[position]):>10} {densities[position]:.1%}" for position in ranked)
+    return lines
+
+
+def _lengths_report(columns: CorpusColumns, top: int) -> list[str]:
+    across: Counter[int] = columns.word_lengths(ACROSS)
+    down: Counter[int] = columns.word_lengths(DOWN)
+    lines: list[str] = ["word length   across     down"]
+    lines.extend(f"{length:>11} {across[length]:>8} {down[length]:>8}" for length in sorted(across.keys() | down.keys()))
+    return lines
+
+
+def _reuse_report(columns: CorpusColumns, top: int) -> list[str]:
+    lines: list[str] = ["most reused answers"]
+    lines.extend(f"{reuse.answer:>15} {reuse.uses:>4} {reuse.first:>10} .. {reuse.last}"
+                 for reuse in columns.answer_reuse(top))
+    lines.append("answers seen in an earlier puzzle, by month")
+    lines.extend(f"{month // 100}-{month % 100:02} {repeats / answers:>6.1%} of {answers}"
+                 for month, (answers, repeats) in sorted(columns.reuse_by_month().items()))
+    return lines
+
+
+def _days_report(columns: CorpusColumns, top: int) -> list[str]:
+    lines: list[str] = ["day        puzzles  cells blocks  length  8+ fresh rebus"]
+    lines.extend(
+        f"{report.day:<10} {report.puzzles:>7} {report.cells:>6.0f} {report.block_density:>6.1%} "
+        f"{report.word_length:>7.2f} {report.long_words:>4.0%} {report.fresh_answers:>5.0%} {report.rebus_cells:>5.1f}"
+        for report in columns.day_report()
+    )
+    return lines
+
+
+REPORTS: dict[str, Callable[[CorpusColumns, int], list[str]]] = {
+    "letters": _letters_report,
+    "blocks": _blocks_report,
+    "lengths": _lengths_report,
+    "reuse": _reuse_report,
+    "days": _days_report,
+}
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="aggregate reports across the puzzle corpus")
+    parser.add_argument("--report", action="append", choices=list(REPORTS), help="repeatable, all of them by default")
+    parser.add_argument("--source", default=DATA_PATH, help="puzzle directory or pack")
+    parser.add_argument("--cache", default=ANALYTICS_PATH, help="column cache, rebuilt when the source changes")
+    parser.add_argument("--top", type=int, default=10)
+    args: Namespace = parser.parse_args()
+
+    start: float = time.perf_counter()
+    columns: CorpusColumns = CorpusColumns.open(Path(args.source), Path(args.cache) if args.cache else None)
+    loaded: float = time.perf_counter()
+
+    lines: list[str] = []
+    for name in args.report or REPORTS:
+        lines.extend(REPORTS[name](columns, args.top))
+        lines.append("")
+
+    queried: float = time.perf_counter()
+    for line in lines:
+        print(line)
+
+    print(
+        f"{len(columns)} puzzles, {len(columns.answer_lengths)} answers, "
+        f"loaded in {(loaded - start) * 1000:.1f}ms, reported in {(queried - loaded) * 1000:.1f}ms",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
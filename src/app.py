@@ -1,41 +1,205 @@
-from typing import Iterator
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
 
 import pygame
+from pygame.event import Event
+from pygame.rect import Rect
+from pygame.time import Clock
 
-from config import WINDOW_HEIGHT, WINDOW_WIDTH
+from config import (
+    COOP_ENABLED,
+    COOP_HOST,
+    COOP_PORT,
+    COOP_ROOM,
+    DATA_PATH,
+    EVENT_DRIVEN,
+    HEADLESS,
+    IDLE_TIMEOUT_MS,
+    MANIFEST_PATH,
+    MAX_FPS,
+    METRICS_REFRESH_MS,
+    PACK_PATH,
+    RESIZE_THROTTLE_MS,
+    WINDOW_HEIGHT,
+    WINDOW_RESIZABLE,
+    WINDOW_WIDTH,
+)
+from coop_client import CoopClient
 from cross_words import CrossWords
 from delta_time import DeltaTime
-from puzzle_reader import Puzzle, puzzles
+from display_metrics import MetricsOverlay
+from hints import HINTS
+from journal import JOURNAL
+from layout_cache import LAYOUT_CACHE
+from metrics import METRICS
+from puzzle_catalog import PuzzleCatalog
+from puzzle_pack import PuzzlePack
+from puzzle_prefetch import PuzzlePrefetcher
+from save_state import SAVES, Snapshot
 
 
 class CrossWordsApp:
 
-    def __init__(self) -> None:
+    def __init__(self, headless: bool = HEADLESS) -> None:
         self._done: bool = False
+        self._full_update: bool = True
         self._delta_time: DeltaTime = DeltaTime()
+        self._clock: Clock = Clock()
+        self._resize_pending: bool = False
+        self._resized_at: int = 0
+
+        if headless:
+            # the dummy driver gives an offscreen display surface, so everything runs without a window
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
 
         pygame.init()
-        pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE if WINDOW_RESIZABLE else 0)
+
+        pack_path: Path = Path(PACK_PATH)
+        source: Path = pack_path if pack_path.exists() else Path(DATA_PATH)
+        catalog: PuzzleCatalog = PuzzleCatalog.from_pack(PuzzlePack(pack_path)) if pack_path.exists() \
+            else PuzzleCatalog.from_directory(source, Path(MANIFEST_PATH))
+        self._prefetcher: PuzzlePrefetcher = PuzzlePrefetcher(catalog)
+        self._overlay: MetricsOverlay = MetricsOverlay(METRICS)
+        HINTS.start(source)
+        SAVES.start()
+
+        self._coop: Optional[CoopClient] = None
+        if COOP_ENABLED:
+            self._coop = CoopClient(COOP_HOST, COOP_PORT, COOP_ROOM)
+            self._coop.start()
+            if self._coop.error is not None:
+                # no server to share with, solving goes on alone and keeps its local saves
+                print(f"co-op unavailable, playing solo: {self._coop.error}", file=sys.stderr)
+                self._coop = None
+
+    def _autosave(self, cross_words: CrossWords) -> None:
+        # a co-op grid belongs to the room, saving it would overwrite the player's own progress for the day
+        if self._coop is not None:
+            return
+
+        if cross_words.take_unsaved():
+            SAVES.save(cross_words.snapshot())
+
+    def _resume(self, cross_words: CrossWords) -> CrossWords:
+        if self._coop is not None:
+            # the room holds the shared grid, local saves would only fight it
+            cross_words.attach(self._coop)
+            return self._show(cross_words)
+
+        snapshot: Optional[Snapshot] = SAVES.load(cross_words.date)
+        if snapshot is not None:
+            cross_words.restore(snapshot)
+
+        self._show(cross_words)
+        JOURNAL.show(cross_words.date, cross_words.size, cross_words.snapshot)
+        return cross_words
+
+    def _show(self, cross_words: CrossWords) -> CrossWords:
+        # prefetched puzzles were laid out for the window size at the time they were built
+        cross_words.resize(pygame.display.get_surface())
+        pygame.display.get_surface().fill("black")
+        cross_words.invalidate()
+        self._full_update = True
+        return cross_words
+
+    def _apply_resize(self, cross_words: CrossWords) -> None:
+        # a drag sends a stream of resize events, relayout runs at most once per throttle interval
+        # and once more for the size the drag ends at
+        if not self._resize_pending or pygame.time.get_ticks() - self._resized_at < RESIZE_THROTTLE_MS:
+            return
+
+        self._resize_pending = False
+        self._resized_at = pygame.time.get_ticks()
+        with METRICS.timer("relayout"):
+            self._show(cross_words)
+
+    def _wait_events(self, cross_words: CrossWords) -> list[Event]:
+        if not EVENT_DRIVEN or cross_words.is_animating():
+            return pygame.event.get()
+
+        # nothing to draw, so sleep until input arrives instead of spinning, or until a held back resize is due
+        timeout: int = IDLE_TIMEOUT_MS
+        if self._resize_pending:
+            timeout = max(RESIZE_THROTTLE_MS - (pygame.time.get_ticks() - self._resized_at), 1)
 
-        self._puzzles: Iterator[Puzzle] = puzzles()
+        if METRICS.overlay:
+            # the overlay shows live numbers, so it is redrawn on a timer even without input
+            timeout = min(timeout, METRICS_REFRESH_MS)
+
+        event: Event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+
+        return [event] + pygame.event.get()
 
     def run(self) -> None:
 
-        cross_words: CrossWords = CrossWords(next(self._puzzles))
+        cross_words: CrossWords = self._resume(self._prefetcher.next())
 
         while not self._done:
+            events: list[Event] = self._wait_events(cross_words)
             self._delta_time.set()
+            # the frame sample covers the work done for it, the wait for input and the frame cap are idle time
+            frame_start: float = time.perf_counter()
+
+            with METRICS.timer("events"):
+                for event in events:
+                    cross_words.process_input(event)
+                    if event.type == pygame.QUIT:
+                        self._done = True
+
+                    if event.type == pygame.VIDEORESIZE:
+                        self._resize_pending = True
+
+                    if event.type == pygame.KEYDOWN:
+                        if event.key in (pygame.K_RIGHT, pygame.K_LEFT):
+                            self._autosave(cross_words)
+
+                        if event.key == pygame.K_RIGHT:
+                            cross_words = self._resume(self._prefetcher.next())
 
-            for event in pygame.event.get():
-                cross_words.process_input(event)
-                if event.type == pygame.QUIT:
-                    self._done = True
+                        elif event.key == pygame.K_LEFT:
+                            cross_words = self._resume(self._prefetcher.previous())
 
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RIGHT:
-                        cross_words = CrossWords(next(self._puzzles))
-                        pygame.display.get_surface().fill("black")
+                        elif event.key == pygame.K_F3:
+                            METRICS.toggle_overlay()
+                            if not METRICS.overlay:
+                                # the panel was drawn over the puzzle, so everything under it is drawn again
+                                cross_words = self._show(cross_words)
 
-            cross_words.render()
+            self._apply_resize(cross_words)
+            self._autosave(cross_words)
             cross_words.update(self._delta_time.get())
-            pygame.display.update()
+            with METRICS.timer("render"):
+                updated: list[Rect] = cross_words.render()
+
+            if METRICS.overlay:
+                updated.append(self._overlay.render(pygame.display.get_surface()))
+
+            with METRICS.timer("display_update"):
+                if self._full_update:
+                    pygame.display.update()
+                    self._full_update = False
+
+                elif updated:
+                    pygame.display.update(updated)
+
+            METRICS.record("frame", (time.perf_counter() - frame_start) * 1000)
+            METRICS.tick()
+            self._clock.tick(MAX_FPS)
+
+        if METRICS.enabled:
+            METRICS.export()
+
+        self._autosave(cross_words)
+        self._prefetcher.close()
+        HINTS.close()
+        SAVES.close()
+        JOURNAL.close()
+        LAYOUT_CACHE.save()
+        if self._coop is not None:
+            self._coop.close()
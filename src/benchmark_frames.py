@@ -0,0 +1,191 @@
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Any, Optional
+
+# must be set before pygame starts, so the benchmark never opens a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from pygame.event import Event
+from pygame.surface import Surface
+
+from config import DATA_PATH, WINDOW_HEIGHT, WINDOW_WIDTH
+from cross_words import CrossWords
+from metrics import percentile
+from puzzle_catalog import PuzzleCatalog
+from puzzle_reader import Puzzle
+
+BENCHMARK_VERSION: int = 1
+# click targets as fractions of the window, the first ones land on the board and the rest on the clue lists
+CLICK_POINTS: list[tuple[float, float]] = [
+    (0.02, 0.02), (0.2, 0.3), (0.45, 0.5), (0.3, 0.8), (0.6, 0.95),
+    (0.75, 0.2), (0.75, 0.6), (0.9, 0.4), (0.9, 0.85),
+]
+SCROLL_POINTS: list[tuple[float, float]] = [(0.75, 0.5), (0.9, 0.5)]
+
+
+def _key(key: int, unicode: str = "") -> Event:
+    return Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0, scancode=0)
+
+
+def _click(point: tuple[float, float], button: int = 1) -> Event:
+    return Event(pygame.MOUSEBUTTONDOWN, pos=(int(point[0] * WINDOW_WIDTH), int(point[1] * WINDOW_HEIGHT)),
+                 button=button)
+
+
+def input_script() -> list[Event]:
+    events: list[Event] = []
+    for point in CLICK_POINTS:
+        events.append(_click(point))
+        events.extend(_key(ord(letter.lower()), letter.lower()) for letter in "CAT")
+        events.append(_key(pygame.K_BACKSPACE))
+        events.append(_click(point))
+
+    events.append(_key(pygame.K_SPACE))
+    for point in SCROLL_POINTS:
+        events.extend(_click(point, 5) for _ in range(6))
+        events.extend(_click(point, 4) for _ in range(3))
+
+    return events
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(values, 0.5), 4),
+        "p99": round(percentile(values, 0.99), 4),
+        "max": round(max(values, default=0.0), 4),
+        "mean": round(sum(values) / max(len(values), 1), 4),
+    }
+
+
+def _measure_memory(puzzle: Puzzle, screen: Surface) -> float:
+    # only python allocations are traced, surface pixels live in SDL
+    gc.collect()
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    cross_words: CrossWords = CrossWords(puzzle, screen)
+    gc.collect()
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del cross_words
+    return (after - before) / 1024
+
+
+def benchmark_puzzle(puzzle: Puzzle, screen: Surface, script: list[Event]) -> dict[str, Any]:
+    start: float = time.perf_counter()
+    cross_words: CrossWords = CrossWords(puzzle, screen)
+    construct_ms: float = (time.perf_counter() - start) * 1000
+
+    frames: list[float] = []
+    start = time.perf_counter()
+    cross_words.render()
+    first_frame_ms: float = (time.perf_counter() - start) * 1000
+
+    for event in script:
+        cross_words.process_input(event)
+        cross_words.update(0)
+        start = time.perf_counter()
+        cross_words.render()
+        frames.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "date": puzzle.date,
+        "construct_ms": construct_ms,
+        "first_frame_ms": first_frame_ms,
+        "frames_ms": frames,
+        "memory_kib": _measure_memory(puzzle, screen),
+    }
+
+
+def _peak_rss_kib() -> Optional[float]:
+    try:
+        import resource
+
+    except ImportError:
+        return None
+
+    # linux reports kilobytes, macos bytes
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == "darwin" else float(peak)
+
+
+def _compare(results: dict[str, Any], baseline_path: Path) -> None:
+    with open(baseline_path.absolute(), "r") as baseline_file:
+        baseline: dict[str, Any] = json.load(baseline_file)
+
+    print(f"{'metric':<28}{'baseline':>12}{'current':>12}{'change':>10}", file=sys.stderr)
+    for metric in ("render_ms", "first_frame_ms", "construct_ms", "memory_kib"):
+        for statistic in ("p50", "p99"):
+            old: float = baseline[metric][statistic]
+            new: float = results[metric][statistic]
+            change: str = f"{(new - old) / old:+.1%}" if old else "n/a"
+            print(f"{metric + ' ' + statistic:<28}{old:>12.3f}{new:>12.3f}{change:>10}", file=sys.stderr)
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="headless frame time, construction and memory benchmark")
+    parser.add_argument("source", nargs="?", default=DATA_PATH)
+    parser.add_argument("--output", help="write the results here instead of stdout")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    parser.add_argument("--label", default="", help="free text stored with the results, e.g. a commit")
+    parser.add_argument("--limit", type=int, default=0, help="only run the first n puzzles")
+    parser.add_argument("--per-puzzle", action="store_true", help="include every puzzle in the output")
+    args: Namespace = parser.parse_args()
+
+    pygame.init()
+    screen: Surface = Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    catalog: PuzzleCatalog = PuzzleCatalog.from_directory(Path(args.source))
+    count: int = min(args.limit, len(catalog)) if args.limit else len(catalog)
+    script: list[Event] = input_script()
+
+    start: float = time.perf_counter()
+    puzzles: list[dict[str, Any]] = [benchmark_puzzle(catalog.load(index), screen, script) for index in range(count)]
+
+    frames: list[float] = [frame for puzzle in puzzles for frame in puzzle["frames_ms"]]
+    results: dict[str, Any] = {
+        "version": BENCHMARK_VERSION,
+        "label": args.label,
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "puzzles": len(puzzles),
+        "frames": len(frames),
+        "elapsed_s": round(time.perf_counter() - start, 2),
+        "render_ms": summarize(frames),
+        "first_frame_ms": summarize([puzzle["first_frame_ms"] for puzzle in puzzles]),
+        "construct_ms": summarize([puzzle["construct_ms"] for puzzle in puzzles]),
+        "memory_kib": summarize([puzzle["memory_kib"] for puzzle in puzzles]),
+        "peak_rss_kib": _peak_rss_kib(),
+    }
+    if args.per_puzzle:
+        results["per_puzzle"] = [
+            {
+                "date": puzzle["date"],
+                "construct_ms": round(puzzle["construct_ms"], 4),
+                "first_frame_ms": round(puzzle["first_frame_ms"], 4),
+                "render_ms": summarize(puzzle["frames_ms"]),
+                "memory_kib": round(puzzle["memory_kib"], 2),
+            }
+            for puzzle in puzzles
+        ]
+
+    output: str = json.dumps(results, indent=2)
+    if args.output:
+        with open(Path(args.output).absolute(), "w") as output_file:
+            output_file.write(output + "\n")
+
+    else:
+        print(output)
+
+    if args.compare:
+        _compare(results, Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
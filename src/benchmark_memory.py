@@ -0,0 +1,57 @@
+import gc
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Any, Callable
+
+from compact_puzzle import CompactCrossWordState, CompactPuzzle
+from config import DATA_PATH
+from corpus_sources import source_puzzles
+from cross_word_state import CrossWordState
+from puzzle_reader import Puzzle
+
+
+def _load_puzzles(source: Path) -> list[Puzzle]:
+    return list(source_puzzles(source))
+
+
+def _measure(build: Callable[[], list[Any]]) -> tuple[int, list[Any]]:
+    gc.collect()
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    resident: list[Any] = build()
+    gc.collect()
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, resident
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="compare resident memory of puzzle representations")
+    parser.add_argument("source", nargs="?", default=DATA_PATH)
+    args: Namespace = parser.parse_args()
+    source: Path = Path(args.source)
+
+    def build_current() -> list[tuple[Puzzle, CrossWordState]]:
+        return [(puzzle, CrossWordState(puzzle)) for puzzle in _load_puzzles(source)]
+
+    def build_compact() -> list[tuple[CompactPuzzle, CompactCrossWordState]]:
+        compact: list[CompactPuzzle] = [CompactPuzzle(puzzle) for puzzle in _load_puzzles(source)]
+        return [(puzzle, CompactCrossWordState(puzzle)) for puzzle in compact]
+
+    current_size, current = _measure(build_current)
+    count: int = len(current)
+    del current
+
+    compact_size, compact = _measure(build_compact)
+    del compact
+
+    print(f"{'layout':<10}{'total KiB':>12}{'per puzzle KiB':>16}")
+    for name, size in (("current", current_size), ("compact", compact_size)):
+        print(f"{name:<10}{size / 1024:>12.1f}{size / 1024 / max(count, 1):>16.2f}")
+
+    print(f"compact layout uses {compact_size / max(current_size, 1):.1%} of the current layout for {count} puzzles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+from puzzle_pack import decode_grid, encode_grid
+from puzzle_reader import Answers, Clues, EMPTY_CELL, Puzzle, VOID_CELL, cell_clues_from_spans
+
+EMPTY_VALUE: int = 0
+# maps a packed answer grid onto an empty value grid, keeping only the void cells
+EMPTY_VALUES: bytes = bytes(ord(VOID_CELL) if cell == ord(VOID_CELL) else EMPTY_VALUE for cell in range(256))
+
+
+def _intern_all(strings: list[str]) -> tuple[str, ...]:
+    return tuple(sys.intern(string) for string in strings)
+
+
+def _pack_text(strings: list[str]) -> tuple[bytes, array]:
+    encoded: list[bytes] = [string.encode("utf-8") for string in strings]
+    offsets: array = array("I", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    return b"".join(encoded), offsets
+
+
+def _unpack_text(text: bytes, offsets: array, first: int, count: int) -> list[str]:
+    return [str(text[offsets[index]:offsets[index + 1]], "utf-8") for index in range(first, first + count)]
+
+
+@dataclass(slots=True, init=False)
+class CompactPuzzle:
+    title: str
+    date: str
+    rows: int
+    cols: int
+    grid: bytes
+    rebus_indexes: array
+    rebus_values: tuple[str, ...]
+    gridnums: array
+    across: array
+    down: array
+    across_ids: array
+    down_ids: array
+    across_answers: tuple[str, ...]
+    down_answers: tuple[str, ...]
+    clue_text: bytes
+    clue_offsets: array
+
+    def __init__(self, puzzle: Puzzle) -> None:
+        grid, rebus_indexes, rebus_values = encode_grid(puzzle.answers.completed)
+        across_ids: list[int] = list(puzzle.clues.across.keys())
+        down_ids: list[int] = list(puzzle.clues.down.keys())
+
+        self.title = sys.intern(puzzle.title)
+        self.date = sys.intern(puzzle.date)
+        self.rows = puzzle.rows
+        self.cols = puzzle.cols
+        self.grid = grid
+        self.rebus_indexes = rebus_indexes
+        self.rebus_values = _intern_all(rebus_values)
+        self.gridnums = array("H", puzzle.clues.grid)
+        self.across = array("H", puzzle.clues.by_index.across)
+        self.down = array("H", puzzle.clues.by_index.down)
+        self.across_ids = array("H", across_ids)
+        self.down_ids = array("H", down_ids)
+        # answers repeat across the corpus so they are shared, clue text is mostly unique so it is packed
+        self.across_answers = _intern_all([puzzle.answers.across[id_] for id_ in across_ids])
+        self.down_answers = _intern_all([puzzle.answers.down[id_] for id_ in down_ids])
+        self.clue_text, self.clue_offsets = _pack_text(
+            [puzzle.clues.across[id_] for id_ in across_ids] + [puzzle.clues.down[id_] for id_ in down_ids]
+        )
+
+    def is_void(self, index: int) -> bool:
+        return self.grid[index] == ord(VOID_CELL)
+
+    def across_clues(self) -> list[str]:
+        return _unpack_text(self.clue_text, self.clue_offsets, 0, len(self.across_ids))
+
+    def down_clues(self) -> list[str]:
+        return _unpack_text(self.clue_text, self.clue_offsets, len(self.across_ids), len(self.down_ids))
+
+    def to_puzzle(self) -> Puzzle:
+        return Puzzle(
+            self.title,
+            self.date,
+            self.rows,
+            self.cols,
+            Answers(
+                dict(zip(self.across_ids, self.across_answers)),
+                dict(zip(self.down_ids, self.down_answers)),
+                decode_grid(self.grid, self.rebus_indexes, list(self.rebus_values))
+            ),
+            Clues(
+                dict(zip(self.across_ids, self.across_clues())),
+                dict(zip(self.down_ids, self.down_clues())),
+                cell_clues_from_spans(array("H", self.across), array("H", self.down), self.cols),
+                self.gridnums.tolist()
+            )
+        )
+
+
+@dataclass(slots=True, init=False)
+class CompactCrossWordState:
+    puzzle: CompactPuzzle
+    values: bytearray
+    locked_in: bytearray
+    selected: Optional[int]
+    selected_across: Optional[int]
+    selected_down: Optional[int]
+
+    def __init__(self, puzzle: CompactPuzzle) -> None:
+        size: int = puzzle.rows * puzzle.cols
+        self.puzzle = puzzle
+        self.values = bytearray(puzzle.grid.translate(EMPTY_VALUES))
+        self.locked_in = bytearray((size + 7) // 8)
+        self.selected = None
+        self.selected_across = None
+        self.selected_down = None
+
+    def get_value(self, index: int) -> str:
+        value: int = self.values[index]
+        return EMPTY_CELL if value == EMPTY_VALUE else chr(value)
+
+    def set_value(self, index: int, value: str) -> None:
+        if len(value) > 1 or (value and ord(value) > 0xff):
+            raise ValueError(f"Compact state only holds single latin-1 characters, got {value!r}")
+
+        self.values[index] = ord(value) if value else EMPTY_VALUE
+
+    def is_locked_in(self, index: int) -> bool:
+        return bool(self.locked_in[index >> 3] & (1 << (index & 7)))
+
+    def set_locked_in(self, index: int, locked_in: bool) -> None:
+        if locked_in:
+            self.locked_in[index >> 3] |= 1 << (index & 7)
+
+        else:
+            self.locked_in[index >> 3] &= ~(1 << (index & 7)) & 0xff
@@ -1,6 +1,21 @@
-DATA_PATH: str = r"data\2013"
+DATA_PATH: str = "data/2013"
+PACK_PATH: str = "data/2013.pack"
+MANIFEST_PATH: str = "data/2013.manifest.json"
+CORPUS_INDEX_PATH: str = "data/2013.index.json"
+LAYOUT_CACHE_PATH: str = "data/layout_cache.json"
+ANALYTICS_PATH: str = "data/2013.analytics.bin"
+PREFETCH_DEPTH: int = 2
 WINDOW_WIDTH: int = 1180
 WINDOW_HEIGHT: int = 800
+WINDOW_RESIZABLE: bool = True
+MIN_WINDOW_WIDTH: int = 640
+MIN_WINDOW_HEIGHT: int = 400
+MIN_METADATA_WIDTH: int = 320
+RESIZE_THROTTLE_MS: int = 50
+LAYOUT_MEMO_SIZE: int = 32
+LAYOUT_CACHE_SIZE: int = 2048
+MEASURE_CACHE_SIZE: int = 1024
+CELL_SURFACE_CACHE_SIZE: int = 1024
 PADDING: int = 2
 HOVER_ALPHA: int = 50
 WRONG_PAD: int = 7
@@ -10,3 +25,34 @@ BOARD_PADDING: int = 6
 TITLE_FONT_SIZE: int = 30
 DATE_FONT_SIZE: int = 15
 LINE_SEP: int = 2
+GLYPH_CACHE_SIZE: int = 512
+EVENT_DRIVEN: bool = True
+MAX_FPS: int = 60
+IDLE_TIMEOUT_MS: int = 500
+MAX_FONT_SIZE: int = 256
+REFERENCE_FONT_SIZE: int = 32
+CLUE_SURFACE_CACHE_SIZE: int = 64
+HINT_LIMIT: int = 40
+HINT_BATCH_SIZE: int = 10
+HINT_FONT_SIZE: int = 14
+HINT_LINES: int = 5
+HEADLESS: bool = False
+METRICS_ENABLED: bool = False
+METRICS_PATH: str = "data/metrics.json"
+METRICS_WINDOW: int = 600
+METRICS_EXPORT_INTERVAL_S: float = 10
+METRICS_FONT_SIZE: int = 13
+METRICS_REFRESH_MS: int = 250
+SAVE_PATH: str = "data/saves.bin"
+SAVE_DEBOUNCE_S: float = 0.5
+SAVE_MAX_DELAY_S: float = 2.0
+SAVE_COMPACT_RATIO: int = 4
+JOURNAL_ENABLED: bool = False
+JOURNAL_PATH: str = "data/session.journal"
+COOP_ENABLED: bool = False
+COOP_HOST: str = "127.0.0.1"
+COOP_PORT: int = 7345
+COOP_ROOM: str = "default"
+COOP_SYNC_INTERVAL_MS: int = 33
+READ_AHEAD_DEPTH: int = 64
+READ_BUFFER_SIZE: int = 1 << 20
@@ -0,0 +1,284 @@
+import asyncio
+import struct
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Optional
+
+from config import COOP_HOST, COOP_PORT, COOP_SYNC_INTERVAL_MS, DATA_PATH, PACK_PATH
+from coop_protocol import (
+    CHECK,
+    DELTA,
+    DELTA_ENTRY,
+    DELTA_HEADER,
+    EDIT,
+    EDIT_HEADER,
+    JOIN,
+    JOIN_HEADER,
+    MAX_VALUE_BYTES,
+    MAX_VALUE_LENGTH,
+    SNAPSHOT,
+    SNAPSHOT_HEADER,
+    CellState,
+    encode_error,
+    frame,
+    split_frames,
+)
+from cross_word_state import CrossWordState
+from puzzle_catalog import PuzzleCatalog
+from puzzle_pack import PuzzlePack
+from puzzle_reader import EMPTY_CELL, VOID_CELL, Puzzle, key_date
+from save_state import Snapshot, encode_snapshot
+
+
+class Room:
+
+    def __init__(self, name: str, date_key: int, puzzle: Puzzle) -> None:
+        self.name: str = name
+        self.date_key: int = date_key
+        self.state: CrossWordState = CrossWordState(puzzle)
+        self.cell_states: bytearray = bytearray([CellState.EMPTY.value]) * len(self.state.values)
+        self.members: set["CoopConnection"] = set()
+        # cells changed since the last flush, the newest value wins so a burst of edits to one cell sends once
+        self.changed: dict[int, None] = {}
+
+    def edit(self, index: int, value: str) -> bool:
+        if not 0 <= index < len(self.state.values) or self.state.values[index] == VOID_CELL:
+            return False
+
+        if value != EMPTY_CELL and not value.isalpha():
+            return False
+
+        # upper casing can lengthen a value, so the limits apply to what is stored and sent
+        value = value.upper()
+        if len(value) > MAX_VALUE_LENGTH or len(value.encode("utf-8")) > MAX_VALUE_BYTES:
+            return False
+
+        if self.state.locked_in[index]:
+            return True
+
+        self.state.set_value(index, value)
+        self.cell_states[index] = (CellState.EMPTY if value == EMPTY_CELL else CellState.FILLED).value
+        self.changed[index] = None
+        return True
+
+    def check(self) -> None:
+        for index in self.state.check():
+            self.cell_states[index] = (CellState.CORRECT if self.state.locked_in[index] else CellState.WRONG).value
+            self.changed[index] = None
+
+    def snapshot(self) -> bytes:
+        locked_in: int = 0
+        wrong: int = 0
+        for index, state in enumerate(self.cell_states):
+            if state == CellState.CORRECT.value:
+                locked_in |= 1 << index
+
+            elif state == CellState.WRONG.value:
+                wrong |= 1 << index
+
+        snapshot: Snapshot = Snapshot(self.state.puzzle.date, self.state.values, locked_in, wrong, None, None, None,
+                                      0, 0)
+        return frame(SNAPSHOT_HEADER.pack(SNAPSHOT, self.date_key) + encode_snapshot(snapshot))
+
+    def delta(self) -> bytes:
+        parts: list[bytes] = [DELTA_HEADER.pack(DELTA, self.date_key, len(self.changed))]
+        for index in self.changed:
+            value: bytes = self.state.values[index].encode("utf-8")
+            parts.append(DELTA_ENTRY.pack(index, self.cell_states[index], len(value)))
+            parts.append(value)
+
+        self.changed.clear()
+        return frame(b"".join(parts))
+
+
+class CoopConnection(asyncio.Protocol):
+
+    def __init__(self, server: "CoopServer") -> None:
+        self._server: CoopServer = server
+        self._buffer: bytearray = bytearray()
+        self._transport: Optional[asyncio.Transport] = None
+        self.room: Optional[Room] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport
+        self._server.connections += 1
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._server.connections -= 1
+        self._server.leave(self)
+
+    def send(self, data: bytes) -> None:
+        if self._transport is not None and not self._transport.is_closing():
+            self._transport.write(data)
+
+    def data_received(self, data: bytes) -> None:
+        self._buffer.extend(data)
+        try:
+            for payload in split_frames(self._buffer):
+                self._handle(payload)
+
+        except (IndexError, ValueError, struct.error, UnicodeDecodeError) as error:
+            self.send(encode_error(str(error)))
+            self._transport.close()
+
+    def _handle(self, payload: bytes) -> None:
+        kind: int = payload[0]
+        if kind == EDIT:
+            if self.room is None:
+                raise ValueError("Edit before joining a room")
+
+            (_, index) = EDIT_HEADER.unpack_from(payload)
+            if not self.room.edit(index, payload[EDIT_HEADER.size:].decode("utf-8")):
+                raise ValueError(f"Invalid edit of cell {index}")
+
+            self._server.edits += 1
+            self._server.mark(self.room)
+
+        elif kind == CHECK:
+            if self.room is None:
+                raise ValueError("Check before joining a room")
+
+            self.room.check()
+            self._server.mark(self.room)
+
+        elif kind == JOIN:
+            (_, date_key) = JOIN_HEADER.unpack_from(payload)
+            self._server.join(self, payload[JOIN_HEADER.size:].decode("utf-8"), date_key)
+
+        else:
+            raise ValueError(f"Unknown message kind {kind}")
+
+
+class CoopServer:
+
+    def __init__(self, catalog: PuzzleCatalog, sync_interval: float = COOP_SYNC_INTERVAL_MS / 1000) -> None:
+        self._catalog: PuzzleCatalog = catalog
+        self._sync_interval: float = sync_interval
+        # rooms on the same day share the immutable puzzle
+        self._puzzles: dict[int, Puzzle] = {}
+        self._rooms: dict[tuple[str, int], Room] = {}
+        self._dirty: set[Room] = set()
+        self.connections: int = 0
+        self.edits: int = 0
+        self.sent: int = 0
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def _puzzle(self, date_key: int) -> Puzzle:
+        puzzle: Optional[Puzzle] = self._puzzles.get(date_key)
+        if puzzle is None:
+            index: Optional[int] = self._catalog.find(key_date(date_key))
+            if index is None:
+                raise ValueError(f"No puzzle for {date_key}")
+
+            puzzle = self._catalog.load(index)
+            self._puzzles[date_key] = puzzle
+
+        return puzzle
+
+    def join(self, connection: CoopConnection, name: str, date_key: int) -> None:
+        self.leave(connection)
+        room: Optional[Room] = self._rooms.get((name, date_key))
+        if room is None:
+            room = Room(name, date_key, self._puzzle(date_key))
+            self._rooms[(name, date_key)] = room
+
+        room.members.add(connection)
+        connection.room = room
+        connection.send(room.snapshot())
+
+    def leave(self, connection: CoopConnection) -> None:
+        room: Optional[Room] = connection.room
+        if room is None:
+            return
+
+        connection.room = None
+        room.members.discard(connection)
+        if not room.members:
+            # nobody is left to see the grid, progress ends with the room
+            del self._rooms[(room.name, room.date_key)]
+            self._dirty.discard(room)
+
+    def mark(self, room: Room) -> None:
+        self._dirty.add(room)
+
+    def flush(self) -> None:
+        dirty: set[Room] = self._dirty
+        self._dirty = set()
+        for room in dirty:
+            if not room.changed:
+                continue
+
+            # one room that fails to encode loses its own changes, every other room still syncs
+            try:
+                delta: bytes = room.delta()
+
+            except (struct.error, UnicodeEncodeError) as error:
+                room.changed.clear()
+                print(f"dropped changes for room {room.name} on {room.date_key}: {error}", file=sys.stderr)
+                continue
+
+            for member in room.members:
+                member.send(delta)
+
+            self.sent += len(delta) * len(room.members)
+
+    async def sync(self) -> None:
+        while True:
+            await asyncio.sleep(self._sync_interval)
+            self.flush()
+
+    async def report(self, interval: float) -> None:
+        edits: int = self.edits
+        sent: int = self.sent
+        while True:
+            await asyncio.sleep(interval)
+            print(
+                f"{len(self)} rooms, {self.connections} connections, {(self.edits - edits) / interval:.0f} edits/s, "
+                f"{(self.sent - sent) / interval / 1024:.0f} KiB/s out",
+                file=sys.stderr
+            )
+            edits = self.edits
+            sent = self.sent
+
+    async def serve(self, host: str, port: int, report_interval: float = 0) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        server: asyncio.Server = await loop.create_server(lambda: CoopConnection(self), host, port)
+        tasks: list[asyncio.Task[None]] = [asyncio.create_task(self.sync())]
+        if report_interval > 0:
+            tasks.append(asyncio.create_task(self.report(report_interval)))
+
+        async with server:
+            await server.serve_forever()
+
+
+def load_catalog(source: Optional[str]) -> PuzzleCatalog:
+    if source is None and Path(PACK_PATH).exists():
+        return PuzzleCatalog.from_pack(PuzzlePack(Path(PACK_PATH)))
+
+    return PuzzleCatalog.from_directory(Path(source or DATA_PATH))
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="serve shared puzzle rooms for co-op solving")
+    parser.add_argument("--source", help="puzzle directory, the pack or data directory from the config by default")
+    parser.add_argument("--host", default=COOP_HOST)
+    parser.add_argument("--port", type=int, default=COOP_PORT)
+    parser.add_argument("--report", type=float, default=5, help="seconds between load reports, 0 turns them off")
+    args: Namespace = parser.parse_args()
+
+    start: float = time.perf_counter()
+    server: CoopServer = CoopServer(load_catalog(args.source))
+    print(f"serving on {args.host}:{args.port}, catalog loaded in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.report))
+
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import socket
+from queue import Empty, Queue
+from threading import Lock, Thread
+from typing import Optional
+
+import pygame
+from pygame.event import Event
+
+from coop_protocol import (
+    DELTA,
+    ERROR,
+    SNAPSHOT,
+    CellUpdate,
+    decode_delta,
+    decode_snapshot_updates,
+    encode_check,
+    encode_edit,
+    encode_join,
+    split_frames,
+)
+from puzzle_reader import date_key
+
+RECEIVE_SIZE: int = 1 << 16
+# posted from the network thread so an idle event driven loop wakes up for remote edits
+COOP_UPDATE: int = pygame.event.custom_type()
+
+
+class CoopClient:
+
+    def __init__(self, host: str, port: int, room: str) -> None:
+        self._address: tuple[str, int] = (host, port)
+        self._room: str = room
+        self._socket: Optional[socket.socket] = None
+        self._send_lock: Lock = Lock()
+        self._updates: Queue[tuple[int, list[CellUpdate]]] = Queue()
+        self._thread: Optional[Thread] = None
+        self.error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        try:
+            self._socket = socket.create_connection(self._address)
+
+        except OSError as error:
+            self.error = str(error)
+            return
+
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._thread = Thread(target=self._run, name="coop", daemon=True)
+        self._thread.start()
+
+    def _send(self, data: bytes) -> None:
+        if self._socket is None or self.error is not None:
+            return
+
+        try:
+            with self._send_lock:
+                self._socket.sendall(data)
+
+        except OSError as error:
+            self.error = str(error)
+
+    def join(self, date: str) -> None:
+        self._send(encode_join(date_key(date), self._room))
+
+    def edit(self, index: int, value: str) -> None:
+        self._send(encode_edit(index, value))
+
+    def check(self) -> None:
+        self._send(encode_check())
+
+    def poll(self, date: str) -> list[CellUpdate]:
+        # batches for a puzzle that is no longer shown were sent before the last join, they are dropped
+        key: int = date_key(date)
+        updates: list[CellUpdate] = []
+        while True:
+            try:
+                batch_key, batch = self._updates.get_nowait()
+
+            except Empty:
+                return updates
+
+            if batch_key == key:
+                updates.extend(batch)
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _run(self) -> None:
+        connection: socket.socket = self._socket
+        buffer: bytearray = bytearray()
+        try:
+            while data := connection.recv(RECEIVE_SIZE):
+                buffer.extend(data)
+                for payload in split_frames(buffer):
+                    if payload[0] == SNAPSHOT:
+                        self._updates.put(decode_snapshot_updates(payload))
+                        pygame.event.post(Event(COOP_UPDATE))
+
+                    elif payload[0] == DELTA:
+                        self._updates.put(decode_delta(payload))
+                        pygame.event.post(Event(COOP_UPDATE))
+
+                    elif payload[0] == ERROR:
+                        self.error = payload[1:].decode("utf-8")
+
+            self.error = self.error or "connection closed by the server"
+
+        except (OSError, ValueError) as error:
+            self.error = self.error or str(error)
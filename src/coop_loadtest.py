@@ -0,0 +1,183 @@
+import asyncio
+import random
+import time
+from argparse import ArgumentParser, Namespace
+from typing import Optional
+
+from config import COOP_HOST, COOP_PORT
+from coop import CoopServer, load_catalog
+from coop_protocol import (
+    DELTA,
+    SNAPSHOT,
+    CellUpdate,
+    decode_delta,
+    decode_snapshot_updates,
+    encode_edit,
+    encode_join,
+    split_frames,
+)
+from metrics import percentile
+from puzzle_catalog import PuzzleCatalog
+from puzzle_reader import date_key
+
+TICK_S: float = 0.01
+
+
+class SimulatedClient(asyncio.Protocol):
+
+    def __init__(self, room: str, key: int, seed: int) -> None:
+        self._room: str = room
+        self._key: int = key
+        self._random: random.Random = random.Random(seed)
+        self._buffer: bytearray = bytearray()
+        self._transport: Optional[asyncio.Transport] = None
+        # one sampled edit per tick, its round trip ends when a delta carries it back
+        self._probe: Optional[tuple[int, str, float]] = None
+        self.cells: list[int] = []
+        self.sent: int = 0
+        self.received: int = 0
+        self.latencies: list[float] = []
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport
+        transport.write(encode_join(self._key, self._room))
+
+    def data_received(self, data: bytes) -> None:
+        self._buffer.extend(data)
+        for payload in split_frames(self._buffer):
+            if payload[0] == SNAPSHOT:
+                _, updates = decode_snapshot_updates(payload)
+                self.cells = [update.index for update in updates]
+
+            elif payload[0] == DELTA:
+                _, updates = decode_delta(payload)
+                self.received += len(updates)
+                self._match_probe(updates)
+
+    def _match_probe(self, updates: list[CellUpdate]) -> None:
+        if self._probe is None:
+            return
+
+        index, value, sent = self._probe
+        for update in updates:
+            if update.index == index and update.value == value:
+                self.latencies.append((time.perf_counter() - sent) * 1000)
+                self._probe = None
+                return
+
+    def send_edits(self, count: int) -> None:
+        if self._transport is None or not self.cells or self._transport.is_closing():
+            return
+
+        frames: list[bytes] = []
+        for _ in range(count):
+            index: int = self._random.choice(self.cells)
+            value: str = chr(ord("A") + self._random.randrange(26))
+            frames.append(encode_edit(index, value))
+            if self._probe is None:
+                self._probe = (index, value, time.perf_counter())
+
+        self.sent += count
+        self._transport.write(b"".join(frames))
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+
+async def run_load(host: str, port: int, catalog: PuzzleCatalog, rooms: int, clients: int, rate: float,
+                   duration: float) -> list[SimulatedClient]:
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    simulated: list[SimulatedClient] = []
+    for room in range(rooms):
+        key: int = date_key(catalog[room % len(catalog)].date)
+        for client in range(clients):
+            protocol: SimulatedClient = SimulatedClient(f"load-{room}", key, room * clients + client)
+            await loop.create_connection(lambda: protocol, host, port)
+            simulated.append(protocol)
+
+    while any(not client.cells for client in simulated):
+        await asyncio.sleep(TICK_S)
+
+    # edits are owed for the time that really passed, and fractions carry over, so the average rate holds
+    owed: float = 0.0
+    start: float = time.perf_counter()
+    last: float = start
+    while last - start < duration:
+        await asyncio.sleep(TICK_S)
+        now: float = time.perf_counter()
+        owed += rate * (min(now, start + duration) - last)
+        last = now
+        count: int = int(owed)
+        owed -= count
+        if count:
+            for client in simulated:
+                client.send_edits(count)
+
+    # let the last deltas arrive
+    await asyncio.sleep(0.5)
+    return simulated
+
+
+async def run(args: Namespace) -> None:
+    catalog: PuzzleCatalog = load_catalog(args.source)
+    server_task: Optional[asyncio.Task[None]] = None
+    server: Optional[CoopServer] = None
+    if args.serve:
+        server = CoopServer(catalog)
+        server_task = asyncio.create_task(server.serve(args.host, args.port))
+        await asyncio.sleep(0.1)
+
+    start: float = time.perf_counter()
+    simulated: list[SimulatedClient] = await run_load(args.host, args.port, catalog, args.rooms, args.clients,
+                                                      args.rate, args.duration)
+    elapsed: float = time.perf_counter() - start
+    sent: int = sum(client.sent for client in simulated)
+    received: int = sum(client.received for client in simulated)
+    latencies: list[float] = [latency for client in simulated for latency in client.latencies]
+
+    print(f"{args.rooms} rooms x {args.clients} clients for {args.duration:.0f}s")
+    print(f"sent {sent} edits, {sent / args.duration:.0f}/s, received {received} delta cells")
+    print(f"round trip ms p50 {percentile(latencies, 0.5):.1f} p99 {percentile(latencies, 0.99):.1f} "
+          f"over {len(latencies)} probes, {elapsed:.1f}s including connecting")
+    if server is not None:
+        print(f"server applied {server.edits} edits and sent {server.sent / 1024:.0f} KiB")
+
+    for client in simulated:
+        client.close()
+
+    if server_task is not None:
+        server_task.cancel()
+
+
+def _raise_file_limit(needed: int) -> None:
+    try:
+        import resource
+
+    except ImportError:
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="load test the co-op server with simulated clients")
+    parser.add_argument("--source", help="puzzle directory, the pack or data directory from the config by default")
+    parser.add_argument("--host", default=COOP_HOST)
+    parser.add_argument("--port", type=int, default=COOP_PORT)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=2, help="clients per room")
+    parser.add_argument("--rate", type=float, default=5, help="edits per second per client")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load")
+    parser.add_argument("--serve", action="store_true", help="run the server in this process, sharing its core")
+    args: Namespace = parser.parse_args()
+
+    # every simulated client holds a socket, and with --serve the server end too
+    _raise_file_limit(args.rooms * args.clients * (2 if args.serve else 1) + 64)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import struct
+from enum import Enum, auto
+from typing import NamedTuple
+
+from puzzle_reader import EMPTY_CELL, VOID_CELL
+from save_state import Snapshot, decode_snapshot
+
+# every message is a length prefixed frame
+FRAME: struct.Struct = struct.Struct("<I")
+MAX_FRAME: int = 1 << 20
+KIND: struct.Struct = struct.Struct("<B")
+
+# client to server
+JOIN: int = 1
+EDIT: int = 2
+CHECK: int = 3
+# server to client
+SNAPSHOT: int = 10
+DELTA: int = 11
+ERROR: int = 12
+
+# kind, date key, then the room name
+JOIN_HEADER: struct.Struct = struct.Struct("<BI")
+# kind, cell index, then the value
+EDIT_HEADER: struct.Struct = struct.Struct("<BH")
+# kind, date key, then an encoded snapshot
+SNAPSHOT_HEADER: struct.Struct = struct.Struct("<BI")
+# kind, date key, change count
+DELTA_HEADER: struct.Struct = struct.Struct("<BIH")
+# cell index, cell state, value length, then the value
+DELTA_ENTRY: struct.Struct = struct.Struct("<HBB")
+# the longest rebus in the corpus is six letters, the byte limit is what a delta entry can carry
+MAX_VALUE_LENGTH: int = 16
+MAX_VALUE_BYTES: int = 255
+
+
+class CellState(Enum):
+    EMPTY = auto()
+    FILLED = auto()
+    CORRECT = auto()
+    WRONG = auto()
+
+
+class CellUpdate(NamedTuple):
+    index: int
+    value: str
+    state: CellState
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME.pack(len(payload)) + payload
+
+
+def split_frames(buffer: bytearray) -> list[bytes]:
+    frames: list[bytes] = []
+    offset: int = 0
+    while len(buffer) - offset >= FRAME.size:
+        (length,) = FRAME.unpack_from(buffer, offset)
+        if length > MAX_FRAME:
+            raise ValueError(f"Frame of {length} bytes is over the {MAX_FRAME} byte limit")
+
+        end: int = offset + FRAME.size + length
+        if end > len(buffer):
+            break
+
+        frames.append(bytes(buffer[offset + FRAME.size:end]))
+        offset = end
+
+    del buffer[:offset]
+    return frames
+
+
+def encode_join(date_key: int, room: str) -> bytes:
+    return frame(JOIN_HEADER.pack(JOIN, date_key) + room.encode("utf-8"))
+
+
+def encode_edit(index: int, value: str) -> bytes:
+    return frame(EDIT_HEADER.pack(EDIT, index) + value.encode("utf-8"))
+
+
+def encode_check() -> bytes:
+    return frame(KIND.pack(CHECK))
+
+
+def encode_error(message: str) -> bytes:
+    return frame(KIND.pack(ERROR) + message.encode("utf-8"))
+
+
+def decode_delta(payload: bytes) -> tuple[int, list[CellUpdate]]:
+    _, date_key, count = DELTA_HEADER.unpack_from(payload)
+    offset: int = DELTA_HEADER.size
+    updates: list[CellUpdate] = []
+    for _ in range(count):
+        index, state, length = DELTA_ENTRY.unpack_from(payload, offset)
+        offset += DELTA_ENTRY.size
+        updates.append(CellUpdate(index, payload[offset:offset + length].decode("utf-8"), CellState(state)))
+        offset += length
+
+    return date_key, updates
+
+
+def decode_snapshot_updates(payload: bytes) -> tuple[int, list[CellUpdate]]:
+    _, date_key = SNAPSHOT_HEADER.unpack_from(payload)
+    snapshot: Snapshot = decode_snapshot("", payload[SNAPSHOT_HEADER.size:])
+    updates: list[CellUpdate] = []
+    for index, value in enumerate(snapshot.values):
+        if value == VOID_CELL:
+            continue
+
+        state: CellState = CellState.EMPTY if value == EMPTY_CELL else CellState.FILLED
+        if snapshot.locked_in >> index & 1:
+            state = CellState.CORRECT
+
+        elif snapshot.wrong >> index & 1:
+            state = CellState.WRONG
+
+        updates.append(CellUpdate(index, value, state))
+
+    return date_key, updates
@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from config import CORPUS_INDEX_PATH, DATA_PATH
+from puzzle_decoder import load_puzzle
+from puzzle_pack import PuzzlePack
+from puzzle_reader import EMPTY_CELL, Puzzle, date_key, puzzle_files
+from word_index import Entry, WordIndex
+
+CORPUS_INDEX_VERSION: int = 1
+WILDCARD: str = "?"
+TOKEN_PATTERN: re.Pattern = re.compile(r"[a-z0-9]+")
+
+
+class ClueUse(NamedTuple):
+    date: str
+    direction: str
+    id: int
+    clue: str
+    answer: str
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _scan_file(day: Path) -> Optional[dict[str, Any]]:
+    puzzle: Optional[Puzzle] = load_puzzle(day)
+
+    if puzzle is None:
+        return None
+
+    return _scan_puzzle(puzzle)
+
+
+def _scan_puzzle(puzzle: Puzzle) -> dict[str, Any]:
+    uses: list[list[Any]] = []
+    for direction, clues, spans in (("across", puzzle.clues.across, puzzle.clues.by_index.across_cells),
+                                    ("down", puzzle.clues.down, puzzle.clues.by_index.down_cells)):
+        for id_, cells in spans.items():
+            _, clue = clues[id_].split(".", maxsplit=1)
+            uses.append([direction, id_, clue.strip(), [puzzle.answers.completed[index] for index in cells]])
+
+    return {"date": puzzle.date, "uses": uses}
+
+
+def _sources(path: Path) -> Iterator[tuple[str, int, Callable[[], Optional[dict[str, Any]]]]]:
+    if path.is_file():
+        # every record of a pack shares the pack's mtime, so rebuilding the pack rescans all of them
+        mtime: int = path.stat().st_mtime_ns
+        with PuzzlePack(path) as pack:
+            for position in range(len(pack)):
+                yield f"{path.name}:{position}", mtime, lambda position=position: _scan_puzzle(pack.load(position))
+
+        return
+
+    for day in puzzle_files(path):
+        yield day.relative_to(path).as_posix(), day.stat().st_mtime_ns, lambda day=day: _scan_file(day)
+
+
+class CorpusIndex:
+
+    @staticmethod
+    def open(path: Path, index_path: Optional[Path] = None) -> "CorpusIndex":
+        corpus_index: CorpusIndex = CorpusIndex.load(index_path)
+        corpus_index.update(path, index_path)
+        return corpus_index
+
+    @staticmethod
+    def load(index_path: Optional[Path] = None) -> "CorpusIndex":
+        files: dict[str, Any] = {}
+        if index_path is not None and index_path.exists():
+            try:
+                with open(index_path.absolute(), "r") as index_file:
+                    stored: dict[str, Any] = json.load(index_file)
+
+            except (OSError, ValueError):
+                stored = {}
+
+            if stored.get("version") == CORPUS_INDEX_VERSION:
+                files = stored["files"]
+
+        return CorpusIndex(files)
+
+    def __init__(self, files: dict[str, Any]) -> None:
+        self._files: dict[str, Any] = files
+        self._uses: list[ClueUse] = []
+        self._entries: list[Entry] = []
+        self._by_answer: dict[str, list[int]] = {}
+        self._tokens: dict[str, set[int]] = {}
+        self._words: WordIndex = WordIndex({})
+        self._build()
+
+    def _build(self) -> None:
+        self._uses = []
+        self._entries = []
+        self._by_answer = {}
+        self._tokens = {}
+
+        records: list[dict[str, Any]] = [record["scan"] for record in self._files.values() if record["scan"]]
+        for record in sorted(records, key=lambda scan: date_key(scan["date"])):
+            for direction, id_, clue, cells in record["uses"]:
+                entry: Entry = tuple(cells)
+                use: ClueUse = ClueUse(record["date"], direction, id_, clue, "".join(entry))
+                position: int = len(self._uses)
+                self._uses.append(use)
+                self._entries.append(entry)
+                self._by_answer.setdefault(use.answer, []).append(position)
+                for token in set(tokenize(clue)):
+                    self._tokens.setdefault(token, set()).add(position)
+
+        self._words = WordIndex(Counter(self._entries))
+
+    def update(self, path: Path, index_path: Optional[Path] = None) -> int:
+        files: dict[str, Any] = {}
+        changed: int = 0
+        for source, mtime, scan in _sources(path):
+            record: Optional[dict[str, Any]] = self._files.get(source)
+            if record is None or record["mtime"] != mtime:
+                record = {"mtime": mtime, "scan": scan()}
+                changed += 1
+
+            files[source] = record
+
+        changed += len(self._files.keys() - files.keys())
+        if not changed:
+            return 0
+
+        self._files = files
+        self._build()
+        if index_path is not None:
+            self.save(index_path)
+
+        return changed
+
+    def save(self, index_path: Path) -> None:
+        temporary: Path = index_path.with_name(index_path.name + ".tmp")
+        with open(temporary.absolute(), "w") as index_file:
+            json.dump({"version": CORPUS_INDEX_VERSION, "files": self._files}, index_file)
+
+        os.replace(temporary, index_path)
+
+    def __len__(self) -> int:
+        return len(self._uses)
+
+    @property
+    def words(self) -> WordIndex:
+        return self._words
+
+    def frequency(self, answer: str) -> int:
+        return len(self._by_answer.get(answer, []))
+
+    def answers(self, pattern: str) -> list[str]:
+        cells: list[str] = [EMPTY_CELL if letter == WILDCARD else letter for letter in pattern.upper()]
+        return ["".join(entry) for entry in self._words.matches(cells)]
+
+    def clues_for(self, answer: str) -> list[ClueUse]:
+        return [self._uses[position] for position in self._by_answer.get(answer.upper(), [])]
+
+    def search(self, text: str) -> list[ClueUse]:
+        tokens: list[str] = tokenize(text)
+        if not tokens:
+            return []
+
+        # intersect the shortest posting lists first so the working set only shrinks
+        postings: list[set[int]] = sorted((self._tokens.get(token, set()) for token in set(tokens)), key=len)
+        found: set[int] = set(postings[0])
+        for posting in postings[1:]:
+            found &= posting
+
+        return [self._uses[position] for position in sorted(found)]
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="query answers and clues across the puzzle corpus")
+    parser.add_argument("--source", default=DATA_PATH, help="puzzle directory or puzzle pack")
+    parser.add_argument("--index", default=CORPUS_INDEX_PATH)
+    parser.add_argument("command", choices=["update", "answers", "clues", "search"])
+    parser.add_argument("query", nargs="?", default="",
+                        help="answers: a pattern where ? matches any letter, clues: an answer, search: clue words")
+    args: Namespace = parser.parse_args()
+
+    start: float = time.perf_counter()
+    corpus_index: CorpusIndex = CorpusIndex.load(Path(args.index))
+    changed: int = corpus_index.update(Path(args.source), Path(args.index))
+    loaded: float = time.perf_counter()
+
+    results: list[str] = []
+    if args.command == "update":
+        results = [f"reindexed {changed} changed day files"]
+
+    elif args.command == "answers":
+        results = [f"{answer} ({corpus_index.frequency(answer)})" for answer in corpus_index.answers(args.query)]
+
+    elif args.command == "clues":
+        results = [f"{use.date} {use.id}-{use.direction.capitalize()}: {use.clue}"
+                   for use in corpus_index.clues_for(args.query)]
+
+    elif args.command == "search":
+        results = [f"{use.answer}: {use.clue} ({use.date})" for use in corpus_index.search(args.query)]
+
+    queried: float = time.perf_counter()
+    for result in results:
+        print(result)
+
+    print(
+        f"{len(results)} results from {len(corpus_index)} clues, "
+        f"loaded in {(loaded - start) * 1000:.1f}ms, queried in {(queried - loaded) * 1000:.2f}ms",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
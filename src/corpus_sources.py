@@ -0,0 +1,210 @@
+import bz2
+import gzip
+import io
+import lzma
+import sys
+import tarfile
+import time
+import zipfile
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, BinaryIO, Callable, Iterator, NamedTuple, Optional, Union
+
+from config import DATA_PATH, READ_AHEAD_DEPTH, READ_BUFFER_SIZE
+from puzzle_decoder import decode_puzzle_data
+from puzzle_reader import Puzzle, create_puzzle, puzzle_files
+
+
+class RawPuzzle(NamedTuple):
+    # where the record came from, a file, an archive member or a jsonl line
+    name: str
+    data: bytes
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+_DONE: object = object()
+
+
+def _stream_records(name: str, stream: BinaryIO) -> Iterator[RawPuzzle]:
+    if not name.endswith(".jsonl"):
+        yield RawPuzzle(name, stream.read())
+        return
+
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            yield RawPuzzle(f"{name}:{number}", line)
+
+
+def directory_records(path: Path) -> Iterator[RawPuzzle]:
+    for day in sorted(puzzle_files(path)):
+        yield RawPuzzle(day.relative_to(path).as_posix(), day.read_bytes())
+
+
+def zip_records(path: Path) -> Iterator[RawPuzzle]:
+    with zipfile.ZipFile(path) as archive:
+        for info in sorted(archive.infolist(), key=lambda info: info.filename):
+            if info.is_dir() or not info.filename.endswith((".json", ".jsonl")):
+                continue
+
+            with archive.open(info) as member:
+                yield from _stream_records(info.filename, member)
+
+
+def _open_stream(path: Path) -> BinaryIO:
+    # the compression modules decompress in C, far faster than tarfile's own stream reader
+    raw: BinaryIO
+    if path.name.endswith((".gz", ".tgz")):
+        raw = gzip.open(path, "rb")
+
+    elif path.name.endswith(".bz2"):
+        raw = bz2.open(path, "rb")
+
+    elif path.name.endswith(".xz"):
+        raw = lzma.open(path, "rb")
+
+    else:
+        raw = open(path.absolute(), "rb")
+
+    return io.BufferedReader(raw, buffer_size=READ_BUFFER_SIZE)
+
+
+def tar_records(path: Path) -> Iterator[RawPuzzle]:
+    # stream mode never seeks, members are decompressed once in archive order
+    with _open_stream(path) as stream, tarfile.open(fileobj=stream, mode="r|", bufsize=READ_BUFFER_SIZE) as archive:
+        for member in archive:
+            if not member.isfile() or not member.name.endswith((".json", ".jsonl")):
+                continue
+
+            yield from _stream_records(member.name, archive.extractfile(member))
+
+
+def jsonl_records(path: Path) -> Iterator[RawPuzzle]:
+    with _open_stream(path) as stream:
+        yield from _stream_records(path.name.rsplit(".jsonl", 1)[0] + ".jsonl", stream)
+
+
+def file_records(path: Path) -> Iterator[RawPuzzle]:
+    yield RawPuzzle(path.name, path.read_bytes())
+
+
+# new formats plug in here, the first suffix that matches the file name picks the reader
+SOURCE_READERS: list[tuple[tuple[str, ...], Callable[[Path], Iterator[RawPuzzle]]]] = [
+    ((".zip",), zip_records),
+    ((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz"), tar_records),
+    ((".jsonl", ".jsonl.gz", ".jsonl.bz2", ".jsonl.xz"), jsonl_records),
+    ((".json",), file_records),
+]
+
+
+def source_records(path: Path) -> Iterator[RawPuzzle]:
+    if not path.exists():
+        raise ValueError(f"Corpus source does not exist {path.absolute()}")
+
+    if path.is_dir():
+        return directory_records(path)
+
+    for suffixes, reader in SOURCE_READERS:
+        if path.name.endswith(suffixes):
+            return reader(path)
+
+    raise ValueError(f"Unsupported corpus source {path.name}")
+
+
+def read_ahead(records: Iterator[RawPuzzle], depth: int = READ_AHEAD_DEPTH) -> Iterator[RawPuzzle]:
+    # reading and decompressing run on a thread while the caller parses, the queue bounds what is held in memory
+    queue: Queue[Union[RawPuzzle, _Failure, object]] = Queue(maxsize=depth)
+    stop: Event = Event()
+
+    def put(item: Union[RawPuzzle, _Failure, object]) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+
+            except Full:
+                continue
+
+        return False
+
+    def produce() -> None:
+        try:
+            for record in records:
+                if not put(record):
+                    return
+
+        except BaseException as error:
+            put(_Failure(error))
+            return
+
+        put(_DONE)
+
+    Thread(target=produce, name="read-ahead", daemon=True).start()
+    try:
+        while (item := queue.get()) is not _DONE:
+            if isinstance(item, _Failure):
+                raise item.error
+
+            yield item
+
+    finally:
+        # an abandoned iteration must not leave the reader blocked on a full queue
+        stop.set()
+        try:
+            while True:
+                queue.get_nowait()
+
+        except Empty:
+            pass
+
+
+def source_puzzles(path: Path, depth: int = READ_AHEAD_DEPTH) -> Iterator[Puzzle]:
+    records: Iterator[RawPuzzle] = source_records(path)
+    for record in read_ahead(records, depth) if depth > 0 else records:
+        try:
+            puzzle_data: dict[str, Any] = decode_puzzle_data(record.data)
+
+        except ValueError as error:
+            raise ValueError(f"{record.name} is not valid json: {error}") from error
+
+        puzzle: Optional[Puzzle] = create_puzzle(puzzle_data)
+        if puzzle is not None:
+            yield puzzle
+
+
+def puzzles(path: Path = Path(DATA_PATH)) -> Iterator[Puzzle]:
+    return source_puzzles(path)
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="iterate a corpus source and report its read speed")
+    parser.add_argument("source", nargs="?", default=DATA_PATH,
+                        help="a directory, .zip, .tar(.gz), .json or .jsonl(.gz) file")
+    parser.add_argument("--depth", type=int, default=READ_AHEAD_DEPTH, help="records read ahead, 0 reads inline")
+    parser.add_argument("--raw", action="store_true", help="only read the records, do not build puzzles")
+    args: Namespace = parser.parse_args()
+
+    source: Path = Path(args.source)
+    start: float = time.perf_counter()
+    count: int = 0
+    if args.raw:
+        records: Iterator[RawPuzzle] = source_records(source)
+        for _ in read_ahead(records, args.depth) if args.depth > 0 else records:
+            count += 1
+
+    else:
+        for _ in source_puzzles(source, args.depth):
+            count += 1
+
+    elapsed: float = time.perf_counter() - start
+    speed: str = f", {source.stat().st_size / elapsed / 1024 / 1024:.1f} MiB/s from disk" if source.is_file() else ""
+    print(f"{count} {'records' if args.raw else 'puzzles'} in {elapsed:.2f}s, {count / elapsed:.0f}/s{speed}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
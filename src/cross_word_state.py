@@ -1,7 +1,23 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import NamedTuple, Optional
 
-from puzzle_reader import EMPTY_CELL, Puzzle, VOID_CELL
+from puzzle_reader import CellClues, EMPTY_CELL, Puzzle, VOID_CELL
+
+
+class WordProgress(NamedTuple):
+    length: int
+    filled: int
+    correct: int
+
+    @property
+    def wrong(self) -> int:
+        return self.filled - self.correct
+
+    def is_filled(self) -> bool:
+        return self.filled == self.length
+
+    def is_solved(self) -> bool:
+        return self.correct == self.length
 
 
 @dataclass(slots=True, init=False)
@@ -13,6 +29,15 @@ class CrossWordState:
     selected_across: Optional[int]
     selected_down: Optional[int]
 
+    open_cells: int
+    filled: int
+    correct: int
+    across_filled: dict[int, int]
+    across_correct: dict[int, int]
+    down_filled: dict[int, int]
+    down_correct: dict[int, int]
+    unchecked: set[int]
+
     def __init__(self, puzzle: Puzzle) -> None:
         self.puzzle = puzzle
         self.values = [VOID_CELL if cell == VOID_CELL else EMPTY_CELL
@@ -21,3 +46,70 @@ class CrossWordState:
         self.selected = None
         self.selected_across = None
         self.selected_down = None
+
+        self.open_cells = len(self.values) - self.values.count(VOID_CELL)
+        self.filled = 0
+        self.correct = 0
+        self.across_filled = dict.fromkeys(puzzle.clues.by_index.across_cells, 0)
+        self.across_correct = dict.fromkeys(puzzle.clues.by_index.across_cells, 0)
+        self.down_filled = dict.fromkeys(puzzle.clues.by_index.down_cells, 0)
+        self.down_correct = dict.fromkeys(puzzle.clues.by_index.down_cells, 0)
+        # filled cells changed since the last check
+        self.unchecked = set()
+
+    def set_value(self, index: int, value: str) -> None:
+        previous: str = self.values[index]
+        if value == EMPTY_CELL:
+            self.unchecked.discard(index)
+
+        else:
+            self.unchecked.add(index)
+
+        if previous == value:
+            return
+
+        answer: str = self.puzzle.answers.completed[index]
+        filled: int = (value != EMPTY_CELL) - (previous != EMPTY_CELL)
+        correct: int = (value == answer) - (previous == answer)
+
+        by_index: CellClues = self.puzzle.clues.by_index
+        across: int = by_index.across[index]
+        down: int = by_index.down[index]
+
+        self.filled += filled
+        self.across_filled[across] += filled
+        self.down_filled[down] += filled
+
+        self.correct += correct
+        self.across_correct[across] += correct
+        self.down_correct[down] += correct
+
+        self.values[index] = value
+
+    def check(self) -> list[int]:
+        checked: list[int] = list(self.unchecked)
+        for index in checked:
+            self.locked_in[index] = self.values[index] == self.puzzle.answers.completed[index]
+
+        self.unchecked.clear()
+        return checked
+
+    def across_progress(self, clue_id: int) -> WordProgress:
+        return WordProgress(
+            len(self.puzzle.clues.by_index.across_cells[clue_id]),
+            self.across_filled[clue_id],
+            self.across_correct[clue_id]
+        )
+
+    def down_progress(self, clue_id: int) -> WordProgress:
+        return WordProgress(
+            len(self.puzzle.clues.by_index.down_cells[clue_id]),
+            self.down_filled[clue_id],
+            self.down_correct[clue_id]
+        )
+
+    def is_filled(self) -> bool:
+        return self.filled == self.open_cells
+
+    def is_solved(self) -> bool:
+        return self.correct == self.open_cells
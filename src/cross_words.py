@@ -3,18 +3,29 @@ from itertools import product
 from typing import Optional
 
 import pygame
-from pygame import mouse
 from pygame.event import Event
-from pygame.font import Font, SysFont, get_fonts
 from pygame.math import Vector2
+from pygame.rect import Rect
 from pygame.surface import Surface
 
-from config import CLUE_ID_FONT_SIZE, VALUE_FONT_SIZE, WRONG_PAD
+from config import VALUE_FONT_SIZE, WRONG_PAD
+from coop_client import CoopClient
+from coop_protocol import CellUpdate
 from cross_word_state import CrossWordState
 from display_board import BoardDisplay
 from display_cell import CellDisplay, CellState
+from display_hints import HintDisplay
 from display_metadata import MetadataDisplay, ScrollDirection
+from fonts import GLYPHS
+from hints import HINTS
+from journal import JOURNAL
+from layout import Layout, compute_layout
+from metrics import METRICS
 from puzzle_reader import CellClue, EMPTY_CELL, Puzzle, VOID_CELL
+from save_state import Snapshot
+
+
+PUZZLE_SOLVED: int = pygame.event.custom_type()
 
 
 class SelectionDirection(Enum):
@@ -24,29 +35,166 @@ class SelectionDirection(Enum):
 
 class CrossWords:
 
-    def __init__(self, puzzle: Puzzle) -> None:
+    def __init__(self, puzzle: Puzzle, screen: Optional[Surface] = None) -> None:
+        # rendering goes to the display unless an offscreen surface is given, e.g. when running headless
+        self._screen: Surface = screen if screen is not None else pygame.display.get_surface()
         self._state: CrossWordState = CrossWordState(puzzle)
-        self._font_name: str = get_fonts()[0]
-
-        self._board: BoardDisplay = BoardDisplay(self._state, CellDisplay.get_size(self._state.puzzle))
-        self._metadata: MetadataDisplay = MetadataDisplay(self._board.placement, self._state)
+        # the size laid out for, the display surface itself may already be resized while a relayout is held back
+        self._size: tuple[int, int] = self._screen.get_size()
+        self._layout: Layout = compute_layout(puzzle.rows, puzzle.cols, *self._size)
+        self._board: BoardDisplay = BoardDisplay(self._layout)
+        self._metadata: MetadataDisplay = MetadataDisplay(self._layout, self._state)
 
         self._cells: list[CellDisplay] = []
         rows: int = self._state.puzzle.rows
         cols: int = self._state.puzzle.cols
-        cell_size: Vector2 = CellDisplay.get_size(self._state.puzzle)
+        self._cell_size: Vector2 = self._layout.cell_size
         for row, col in product(range(rows), range(cols)):
             cell: CellDisplay = CellDisplay(
                 Vector2(col, row),
-                cell_size,
+                self._cell_size,
                 (row * cols + col),
             )
-            font: Font = SysFont(self._font_name, CLUE_ID_FONT_SIZE)
-            cell.draw(self._state, font)
+            cell.draw(self._state)
             self._cells.append(cell)
 
+        self._dirty: set[int] = set()
+        self._redraw: bool = False
+        self._hints: Optional[HintDisplay] = None
+        self._hint_request: Optional[int] = None
+        self._unsaved: bool = False
+        self._remote: Optional[CoopClient] = None
+        self._dirty.update(range(len(self._cells)))
+        self.invalidate()
+
+    @property
+    def date(self) -> str:
+        return self._state.puzzle.date
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self._size
+
+    def resize(self, screen: Optional[Surface] = None) -> bool:
+        # only the parts whose geometry changed are rebuilt, the puzzle state and selection carry over
+        if screen is not None:
+            self._screen = screen
+
+        self._size = self._screen.get_size()
+        layout: Layout = compute_layout(self._state.puzzle.rows, self._state.puzzle.cols, *self._size)
+        if layout == self._layout:
+            return False
+
+        if layout.cell != self._layout.cell:
+            cols: int = self._state.puzzle.cols
+            self._cell_size = layout.cell_size
+            self._board = BoardDisplay(layout)
+            for cell in self._cells:
+                cell.resize(Vector2(cell.index % cols, cell.index // cols), self._cell_size)
+                cell.draw(self._state)
+
+            self._dirty.update(range(len(self._cells)))
+
+        else:
+            # same cell size, the board surface still holds every rendered cell and only moves
+            self._board.placement = layout.board_placement
+
+        if layout.metadata[2:] != self._layout.metadata[2:] or layout.board[:2] != self._layout.board[:2]:
+            self._metadata = MetadataDisplay(layout, self._state, self._metadata)
+
+        else:
+            self._metadata.placement = layout.metadata_placement
+
+        if self._hints is not None:
+            self._hints.resize(self._metadata.placement)
+
+        self._layout = layout
+        self.invalidate()
+        return True
+
+    def invalidate(self) -> None:
+        # the screen was cleared, everything is blitted again from surfaces that are still current
+        self._redraw = True
+        self._metadata.dirty = True
+        if self._hints is not None:
+            self._hints.dirty = True
+
+    def snapshot(self) -> Snapshot:
+        locked_in: int = 0
+        wrong: int = 0
+        for cell in self._cells:
+            if cell.state is CellState.CORRECT:
+                locked_in |= 1 << cell.index
+
+            elif cell.state is CellState.WRONG:
+                wrong |= 1 << cell.index
+
+        return Snapshot(
+            self._state.puzzle.date,
+            list(self._state.values),
+            locked_in,
+            wrong,
+            self._state.selected,
+            self._state.selected_across,
+            self._state.selected_down,
+            int(self._metadata.clues_display.across.scroll_pos.y),
+            int(self._metadata.clues_display.down.scroll_pos.y),
+        )
+
+    def restore(self, snapshot: Snapshot) -> None:
+        if len(snapshot.values) != len(self._cells):
+            raise ValueError(f"Snapshot for {snapshot.date} has {len(snapshot.values)} cells, "
+                             f"puzzle has {len(self._cells)}")
+
+        for cell, value in zip(self._cells, snapshot.values):
+            if value == VOID_CELL:
+                continue
+
+            self._state.set_value(cell.index, value)
+            if snapshot.locked_in >> cell.index & 1:
+                cell.state = CellState.CORRECT
+                self._state.locked_in[cell.index] = True
+
+            elif snapshot.wrong >> cell.index & 1:
+                cell.state = CellState.WRONG
+
+            else:
+                cell.state = CellState.EMPTY if value == EMPTY_CELL else CellState.FILLED
+
+            # checked cells stay checked, only edits since the last check wait for the next one
+            if cell.state is not CellState.FILLED:
+                self._state.unchecked.discard(cell.index)
+
+        self._state.selected = snapshot.selected
+        self._state.selected_across = snapshot.selected_across
+        self._state.selected_down = snapshot.selected_down
+        if snapshot.selected is not None:
+            cell_clue: CellClue = self._state.puzzle.clues.by_index[snapshot.selected]
+            self._metadata.clues_display.set_selected(cell_clue.across, cell_clue.down)
+
+        # a save from a larger window may have scrolled further than this one can
+        self._metadata.clues_display.across.scroll_pos.y = snapshot.across_scroll
+        self._metadata.clues_display.across.clamp_scroll()
+        self._metadata.clues_display.down.scroll_pos.y = snapshot.down_scroll
+        self._metadata.clues_display.down.clamp_scroll()
+        self._dirty.update(range(len(self._cells)))
+        self.invalidate()
+
+    def _selection_cells(self) -> list[int]:
+        cells: list[int] = []
+        if self._state.selected_across is not None:
+            cells.extend(self._get_cells_with_clue(self._state.selected_across, SelectionDirection.RIGHT))
+
+        if self._state.selected_down is not None:
+            cells.extend(self._get_cells_with_clue(self._state.selected_down, SelectionDirection.DOWN))
+
+        if self._state.selected is not None:
+            cells.append(self._state.selected)
+
+        return cells
+
     def _process_metadata_click(self, event: Event) -> None:
-        mouse_pos: Vector2 = Vector2(pygame.mouse.get_pos()) - Vector2(self._metadata.placement.topleft)
+        mouse_pos: Vector2 = Vector2(event.pos) - Vector2(self._metadata.placement.topleft)
         if not self._metadata.clues_display.placement.collidepoint(mouse_pos):
             return
 
@@ -69,50 +217,66 @@ class CrossWords:
         if (across_clue := self._metadata.clues_display.across.get_collided(mouse_pos)) is not None:
             self._metadata.clues_display.set_selected(across=across_clue.id)
             self._set_selected(
-                min(self._get_cells_with_clue(across_clue.id, SelectionDirection.RIGHT)),
+                self._get_cells_with_clue(across_clue.id, SelectionDirection.RIGHT).start,
                 SelectionDirection.RIGHT
             )
 
         if (down_clue := self._metadata.clues_display.down.get_collided(mouse_pos)) is not None:
             self._metadata.clues_display.set_selected(down=down_clue.id)
             self._set_selected(
-                min(self._get_cells_with_clue(down_clue.id, SelectionDirection.DOWN)),
+                self._get_cells_with_clue(down_clue.id, SelectionDirection.DOWN).start,
                 SelectionDirection.DOWN
             )
 
-    def _get_cells_with_clue(self, clue_id: int, direction: SelectionDirection) -> list[int]:
-        indexes: list[int] = []
-        for cell in self._cells:
-            cell_clue: CellClue = self._state.puzzle.clues.by_index[cell.index]
-            compare_clue: int = cell_clue.down if direction is SelectionDirection.DOWN else cell_clue.across
-            if compare_clue == clue_id:
-                indexes.append(cell.index)
+    def _get_cells_with_clue(self, clue_id: int, direction: SelectionDirection) -> range:
+        if direction is SelectionDirection.DOWN:
+            return self._state.puzzle.clues.by_index.down_cells[clue_id]
+
+        return self._state.puzzle.clues.by_index.across_cells[clue_id]
 
-        return indexes
+    def _get_cell_at(self, mouse_pos: Vector2) -> Optional[CellDisplay]:
+        col: int = int(mouse_pos.x // self._cell_size.x)
+        row: int = int(mouse_pos.y // self._cell_size.y)
+        if not (0 <= row < self._state.puzzle.rows and 0 <= col < self._state.puzzle.cols):
+            return None
+
+        return self._cells[row * self._state.puzzle.cols + col]
+
+    def cell_center(self, index: int) -> tuple[int, int]:
+        return self._cells[index].placement.move(self._board.placement.topleft).center
 
     def _process_board_click(self, event: Event) -> None:
-        mouse_pos: Vector2 = Vector2(pygame.mouse.get_pos()) - Vector2(self._board.placement.topleft)
-        for cell in self._cells:
-            if cell.placement.collidepoint(mouse_pos):
-                if self._state.values[cell.index] == VOID_CELL:
-                    return
+        mouse_pos: Vector2 = Vector2(event.pos) - Vector2(self._board.placement.topleft)
+        cell: Optional[CellDisplay] = self._get_cell_at(mouse_pos)
+        if cell is None or self._state.values[cell.index] == VOID_CELL:
+            return
+
+        cell_clue: CellClue = self._state.puzzle.clues.by_index[cell.index]
+        self._metadata.clues_display.set_selected(cell_clue.across, cell_clue.down)
 
-                cell_clue: CellClue = self._state.puzzle.clues.by_index[cell.index]
-                self._metadata.clues_display.set_selected(cell_clue.across, cell_clue.down)
+        if self._state.selected == cell.index:
+            if self._state.selected_down is not None:
+                self._set_selected(cell.index, SelectionDirection.RIGHT)
 
-                if self._state.selected == cell.index:
-                    if self._state.selected_down is not None:
-                        self._set_selected(cell.index, SelectionDirection.RIGHT)
+            elif self._state.selected_across is not None:
+                self._set_selected(cell.index, SelectionDirection.DOWN)
 
-                    elif self._state.selected_across is not None:
-                        self._set_selected(cell.index, SelectionDirection.DOWN)
+        else:
+            self._set_selected(cell.index, SelectionDirection.RIGHT)
 
-                else:
-                    self._set_selected(cell.index, SelectionDirection.RIGHT)
+    def take_unsaved(self) -> bool:
+        unsaved: bool = self._unsaved
+        self._unsaved = False
+        return unsaved
 
     def process_input(self, event: Event) -> None:
+        JOURNAL.record(self._state.puzzle.date, self._size, event)
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN):
+            # cheaper than tracking every edit, the store drops snapshots that did not change
+            self._unsaved = True
+
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos: Vector2 = Vector2(mouse.get_pos())
+            mouse_pos: Vector2 = Vector2(event.pos)
             if self._board.placement.collidepoint(mouse_pos):
                 self._process_board_click(event)
 
@@ -132,19 +296,43 @@ class CrossWords:
             elif event.key == pygame.K_SPACE:
                 self._check_puzzle()
 
-    def _check_puzzle(self) -> None:
-        for index, value in enumerate(self._state.values):
-            if value == VOID_CELL:
-                continue
+            elif event.key == pygame.K_TAB:
+                self._request_hints()
 
-            if value == EMPTY_CELL:
-                continue
+    def _request_hints(self) -> None:
+        direction: str = "across"
+        clue_id: Optional[int] = self._state.selected_across
+        if clue_id is None:
+            direction = "down"
+            clue_id = self._state.selected_down
 
-            if value == self._state.puzzle.answers.completed[index]:
-                self._cells[index].state = CellState.CORRECT
+        if clue_id is None:
+            return
 
-            else:
-                self._cells[index].state = CellState.WRONG
+        self._clear_hints()
+        self._hints = HintDisplay(self._metadata.placement, f"Hints for {clue_id} {direction.capitalize()}")
+        self._hint_request = HINTS.request(self._state.puzzle, self._state.values, direction, clue_id)
+
+    def _clear_hints(self) -> None:
+        if self._hints is None:
+            return
+
+        # the panel is drawn over the clue lists, so they are redrawn to cover it
+        self._hints = None
+        self._hint_request = None
+        self._metadata.dirty = True
+
+    def _check_puzzle(self) -> None:
+        if self._remote is not None:
+            # the room decides what is correct, the result comes back as a delta
+            self._remote.check()
+            return
+
+        for index in self._state.check():
+            cell_state: CellState = CellState.CORRECT if self._state.locked_in[index] else CellState.WRONG
+            if self._cells[index].state is not cell_state:
+                self._cells[index].state = cell_state
+                self._dirty.add(index)
 
     def _move_selected(self, backwards: bool = False) -> None:
         if self._state.selected is None:
@@ -179,17 +367,58 @@ class CrossWords:
         if self._state.selected is None:
             return
 
-        cell: CellDisplay = self._cells[self._state.selected]
-        if cell.state is CellState.CORRECT:
+        if self._state.locked_in[self._state.selected]:
             return
 
-        cell.state = CellState.EMPTY if value == EMPTY_CELL else CellState.FILLED
-        self._state.values[self._state.selected] = value
+        was_solved: bool = self._state.is_solved()
+        self._cells[self._state.selected].state = CellState.EMPTY if value == EMPTY_CELL else CellState.FILLED
+        self._state.set_value(self._state.selected, value)
+        self._dirty.add(self._state.selected)
+        if self._remote is not None:
+            self._remote.edit(self._state.selected, value)
+
+        if self._state.is_solved() and not was_solved:
+            pygame.event.post(Event(PUZZLE_SOLVED, date=self._state.puzzle.date))
+
+    def attach(self, remote: CoopClient) -> None:
+        self._remote = remote
+        remote.join(self._state.puzzle.date)
+
+    def _apply_remote(self, updates: list[CellUpdate]) -> None:
+        was_solved: bool = self._state.is_solved()
+        for index, value, cell_state in updates:
+            cell: CellDisplay = self._cells[index]
+            if self._state.values[index] == value and cell.state is cell_state:
+                continue
+
+            self._state.set_value(index, value)
+            self._state.locked_in[index] = cell_state is CellState.CORRECT
+            if cell_state is CellState.CORRECT or cell_state is CellState.WRONG:
+                self._state.unchecked.discard(index)
+
+            cell.state = cell_state
+            self._dirty.add(index)
+
+        if self._state.is_solved() and not was_solved:
+            pygame.event.post(Event(PUZZLE_SOLVED, date=self._state.puzzle.date))
 
     def update(self, delta_time: float) -> None:
-        pass
+        if self._remote is not None:
+            self._apply_remote(self._remote.poll(self._state.puzzle.date))
+
+        if self._hint_request is None:
+            return
+
+        for batch in HINTS.poll(self._hint_request):
+            self._hints.add(batch.words, batch.done)
+            if batch.done:
+                self._hint_request = None
+
+    def is_animating(self) -> bool:
+        # a pending hint request keeps the loop polling until its last batch arrives
+        return self._redraw or bool(self._dirty) or self._hint_request is not None
 
-    def _render_cell(self, cell: CellDisplay, font: Font) -> None:
+    def _render_cell(self, cell: CellDisplay) -> None:
 
         if self._state.values[cell.index] == VOID_CELL:
             return
@@ -198,9 +427,8 @@ class CrossWords:
 
         #  Rendering user placed value
         if (value := self._state.values[cell.index]) not in [EMPTY_CELL, VOID_CELL]:
-            # FIXME: Probably not a good idea to render value every frame. Do it once when it changes.
             color: str = "blue" if cell.state is CellState.CORRECT else "black"
-            value_sign: Surface = font.render(value, True, color, "white")
+            value_sign: Surface = GLYPHS.render(value, VALUE_FONT_SIZE, color, "white")
             self._board.surface.blit(value_sign, value_sign.get_rect(center=cell.placement.center))
 
         if cell.state is CellState.WRONG:
@@ -221,6 +449,8 @@ class CrossWords:
             self._board.surface.blit(cell.hover, cell.placement)
 
     def _set_selected(self, cell_index: Optional[int], direction: SelectionDirection) -> None:
+        self._clear_hints()
+        self._dirty.update(self._selection_cells())
         self._state.selected = cell_index
         self._state.selected_down = None
         self._state.selected_across = None
@@ -234,13 +464,32 @@ class CrossWords:
         elif direction is SelectionDirection.DOWN:
             self._state.selected_down = self._state.puzzle.clues.by_index[self._state.selected].down
 
-    def render(self) -> None:
-        # TODO: dont create a font every iteration
-        font: Font = SysFont(self._font_name, VALUE_FONT_SIZE)
-        for cell in self._cells:
-            self._render_cell(cell, font)
+        self._dirty.update(self._selection_cells())
+
+    def render(self) -> list[Rect]:
+        screen: Surface = self._screen
+        updated: list[Rect] = []
+
+        for index in self._dirty:
+            cell: CellDisplay = self._cells[index]
+            self._render_cell(cell)
+            if not self._redraw:
+                updated.append(screen.blit(self._board.surface, cell.placement.move(self._board.placement.topleft),
+                                           cell.placement))
+
+        self._dirty.clear()
+        if self._redraw:
+            updated.append(screen.blit(self._board.surface, self._board.placement))
+            self._redraw = False
+
+        with METRICS.timer("metadata_render"):
+            metadata_updated: list[Rect] = self._metadata.render()
+
+        for placement in metadata_updated:
+            updated.append(screen.blit(self._metadata.surface, placement.move(self._metadata.placement.topleft),
+                                       placement))
 
-        self._metadata.render()
+        if self._hints is not None and (self._hints.dirty or self._hints.placement.collidelist(updated) != -1):
+            updated.append(screen.blit(self._hints.render(), self._hints.placement))
 
-        pygame.display.get_surface().blit(self._metadata.surface, self._metadata.placement)
-        pygame.display.get_surface().blit(self._board.surface, self._board.placement)
+        return updated
@@ -1,34 +1,56 @@
 from dataclasses import dataclass
-from enum import Enum, auto
+from functools import lru_cache
 
-import pygame
-from pygame.font import Font
 from pygame.math import Vector2
 from pygame.rect import Rect
 from pygame.surface import Surface
 
-from config import BOARD_PADDING, HOVER_ALPHA, PADDING
+from config import CELL_SURFACE_CACHE_SIZE, CLUE_ID_FONT_SIZE, HOVER_ALPHA, LAYOUT_MEMO_SIZE, PADDING
+from coop_protocol import CellState
 from cross_word_state import CrossWordState
-from puzzle_reader import Puzzle, VOID_CELL
-
-
-class CellState(Enum):
-    EMPTY = auto()
-    FILLED = auto()
-    CORRECT = auto()
-    WRONG = auto()
+from fonts import GLYPHS
+from puzzle_reader import VOID_CELL
+
+
+@lru_cache(maxsize=LAYOUT_MEMO_SIZE)
+def _hover_surface(width: int, height: int) -> Surface:
+    # every cell of one size blends the same translucent square, so they share it
+    hover: Surface = Surface((width, height))
+    hover.fill("black")
+    hover.set_alpha(HOVER_ALPHA)
+    return hover
+
+
+@lru_cache(maxsize=CELL_SURFACE_CACHE_SIZE)
+def _cell_surface(width: int, height: int, clue_number: int, is_void: bool) -> Surface:
+    # a cell only shows its clue number, so cells of one size with the same number look alike and share a surface
+    surface: Surface = Surface((width, height))
+    if is_void:
+        surface.fill("black")
+        return surface
+
+    # the white content is inset in the cell, its black margin draws the grid lines
+    size: Vector2 = Vector2(width, height)
+    padding: Vector2 = Vector2(PADDING)
+    inset: Rect = Rect((0, 0), size - padding)
+    inset.center = surface.get_rect().center
+    content: Surface = surface.subsurface(inset)
+    content.fill("white")
+
+    if clue_number != 0:
+        clue_sign: Surface = GLYPHS.render(
+            str(clue_number),
+            CLUE_ID_FONT_SIZE,
+            "black",
+            "white"
+        )
+        content.blit(clue_sign, padding)
+
+    return surface
 
 
 @dataclass(slots=True, init=False)
 class CellDisplay:
-
-    @staticmethod
-    def get_size(puzzle: Puzzle) -> Vector2:
-        window_rect: Rect = pygame.display.get_surface().get_rect()
-        min_size: int = min(window_rect.width, window_rect.height) - BOARD_PADDING * 2
-        dimensions: Vector2 = Vector2(puzzle.rows, puzzle.cols)
-        return Vector2(min_size) // dimensions.elementwise()
-
     placement: Rect
     surface: Surface
     hover: Surface
@@ -36,35 +58,15 @@ class CellDisplay:
     state: CellState
 
     def __init__(self, position: Vector2, size: Vector2, index: int) -> None:
-        self.placement = Rect(*(position.elementwise() * size).xy, *size.xy)
-        self.surface = Surface(size)
-        self.hover = Surface(size)
         self.index = index
         self.state = CellState.EMPTY
+        self.resize(position, size)
 
-        self.hover.fill("black")
-        self.hover.set_alpha(HOVER_ALPHA)
-
-    def draw(self, state: CrossWordState, font: Font) -> None:
-
-        size: Vector2 = Vector2(self.surface.get_size())
-        padding: Vector2 = Vector2(PADDING)
-        content: Surface = Surface(size - padding)
-
-        if state.values[self.index] == VOID_CELL:
-            self.surface.fill("black")
-            return
-
-        content.fill("white")
-
-        clue_number: int = state.puzzle.clues.grid[self.index]
-        if clue_number != 0:
-            clue_sign: Surface = font.render(
-                str(clue_number),
-                True,
-                "black",
-                "white"
-            )
-            content.blit(clue_sign, padding)
+    def resize(self, position: Vector2, size: Vector2) -> None:
+        self.placement = Rect(*(position.elementwise() * size).xy, *size.xy)
+        self.surface = _cell_surface(self.placement.width, self.placement.height, 0, True)
+        self.hover = _hover_surface(self.placement.width, self.placement.height)
 
-        self.surface.blit(content, content.get_rect(center=self.surface.get_rect().center))
+    def draw(self, state: CrossWordState) -> None:
+        self.surface = _cell_surface(self.placement.width, self.placement.height,
+                                     state.puzzle.clues.grid[self.index], state.values[self.index] == VOID_CELL)
@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+
+import pygame
+from pygame.font import Font
+from pygame.rect import Rect
+from pygame.surface import Surface
+
+from config import HINT_FONT_SIZE, HINT_LINES, LINE_SEP, PADDING
+from display_metadata import split_text
+from fonts import get_font, render_text
+
+
+@dataclass(slots=True, init=False)
+class HintDisplay:
+    surface: Surface
+    placement: Rect
+    font: Font
+
+    title: str
+    words: list[tuple[str, int]]
+    done: bool
+    dirty: bool
+
+    def __init__(self, metadata_placement: Rect, title: str) -> None:
+        self.font = get_font(HINT_FONT_SIZE)
+        self.resize(metadata_placement)
+
+        self.title = title
+        self.words = []
+        self.done = False
+
+    def resize(self, metadata_placement: Rect) -> None:
+        line_height: int = self.font.get_linesize() + LINE_SEP
+        self.surface = Surface((metadata_placement.width, line_height * (HINT_LINES + 1) + PADDING * 4))
+        self.placement = self.surface.get_rect(bottomleft=metadata_placement.bottomleft)
+        self.dirty = True
+
+    def add(self, words: list[tuple[str, int]], done: bool) -> None:
+        self.words.extend(words)
+        self.done = self.done or done
+        self.dirty = True
+
+    def render(self) -> Surface:
+        self.surface.fill("white")
+        pygame.draw.rect(self.surface, "black", self.surface.get_rect(), 1)
+
+        status: str = "" if self.done else " ..."
+        if self.done and not self.words:
+            status = ": no candidates"
+
+        width: int = self.surface.get_width() - PADDING * 4
+        lines: list[str] = [self.title + status]
+        lines.extend(split_text(", ".join(f"{word} ({count})" for word, count in self.words), width, self.font))
+
+        y: int = PADDING * 2
+        for line in lines[:HINT_LINES + 1]:
+            text: Surface = render_text(self.font, line, "black")
+            self.surface.blit(text, (PADDING * 2, y))
+            y += self.font.get_linesize() + LINE_SEP
+
+        self.dirty = False
+        return self.surface
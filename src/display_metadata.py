@@ -1,16 +1,20 @@
 import math
+from bisect import bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Optional
 
-import pygame
-from pygame.font import Font, SysFont, get_fonts
+from pygame.font import Font
 from pygame.math import Vector2
 from pygame.rect import Rect
 from pygame.surface import Surface
 
-from config import HOVER_ALPHA, LINE_SEP
+from config import CLUE_SURFACE_CACHE_SIZE, HOVER_ALPHA, LINE_SEP, MAX_FONT_SIZE, REFERENCE_FONT_SIZE
 from cross_word_state import CrossWordState
+from fonts import default_font_name, get_font, measure_width, render_text, text_size
+from layout import Layout
+from layout_cache import LAYOUT_CACHE
 from puzzle_reader import Clues
 
 
@@ -21,17 +25,13 @@ class ScrollDirection(Enum):
 
 @dataclass(slots=True)
 class ClueDisplay:
-    surface: Surface
+    lines: list[str]
     placement: Rect
     id: int
     is_selected: bool = field(init=False)
-    hover_surface: Surface = field(init=False)
 
     def __post_init__(self) -> None:
         self.is_selected = False
-        self.hover_surface = Surface(self.surface.get_size())
-        self.hover_surface.fill("black")
-        self.hover_surface.set_alpha(HOVER_ALPHA)
 
 
 @dataclass(slots=True, init=False)
@@ -40,93 +40,187 @@ class ClueSet:
     window: Surface
     window_placement: Rect
 
-    surface: Surface
+    font: Font
+    height: int
     clues: dict[int, ClueDisplay]
+    rendered: OrderedDict[int, Surface]
+    hover_surface: Surface
 
     scroll_pos: Vector2
+    drawn_scroll: Optional[float]
+    dirty: bool
 
-    def __init__(self, window: Surface, window_placement: Rect, clue_set: dict[int, str], font: Font) -> None:
+    ids: list[int]
+    tops: list[int]
+
+    def __init__(self, window: Surface, window_placement: Rect, clue_set: dict[int, str], font: Font,
+                 word_widths: Optional[dict[str, int]] = None) -> None:
         self.window = window
         self.window_placement = window_placement
+        self.font = font
         self.clues = {}
+        self.rendered = OrderedDict()
+        self.ids = sorted(list(clue_set.keys()))
+        self.tops = []
 
-        ids: list[int] = sorted(list(clue_set.keys()))
+        # only measure here, clue surfaces are rendered once they scroll into view
         prev_placement: Optional[Rect] = None
-        for id_ in ids:
+        for id_ in self.ids:
 
-            clue: list[str] = split_text(clue_set[id_], window.get_width(), font)
-            clue_surface: Surface = multi_line_render(clue, window.get_width(), font)
-            placement: Rect = clue_surface.get_rect(topleft=(0, 0))
+            clue: list[str] = split_text(clue_set[id_], window.get_width(), font, word_widths)
+            placement: Rect = Rect(0, 0, window.get_width(), lines_height(clue, font))
 
             if prev_placement is not None:
-                placement = clue_surface.get_rect(topleft=prev_placement.bottomleft)
+                placement.topleft = prev_placement.bottomleft
                 placement.y += LINE_SEP * 4
 
-            self.clues[id_] = ClueDisplay(clue_surface, placement, id_)
+            self.clues[id_] = ClueDisplay(clue, placement, id_)
+            self.tops.append(placement.top)
             prev_placement = placement
 
-        surface: Surface = Surface((
-            window.get_width(),
-            Vector2(prev_placement.midbottom).y
-        ))
-        surface.fill("white")
+        self.height = prev_placement.bottom if prev_placement is not None else 0
 
-        for clue_display in self.clues.values():
-            surface.blit(clue_display.surface, clue_display.placement)
+        self.hover_surface = _hover_surface(window)
 
-        self.surface = surface
         self.scroll_pos = Vector2(0)
+        self.drawn_scroll = None
+        self.dirty = True
+
+    def reframe(self, window: Surface, window_placement: Rect) -> None:
+        # same width and font, so the measured clues and their rendered surfaces still fit
+        self.window = window
+        self.window_placement = window_placement
+        self.hover_surface = _hover_surface(window)
+        self.drawn_scroll = None
+        self.dirty = True
+        self.clamp_scroll()
+
+    def keep_view(self, previous: "ClueSet") -> None:
+        for id_, clue in previous.clues.items():
+            self.clues[id_].is_selected = clue.is_selected
+
+        # strips are filled white and clipped to the window, so a clue whose lines did not change
+        # draws the same from a surface rendered for another width
+        if previous.font is self.font:
+            for id_, surface in previous.rendered.items():
+                if previous.clues[id_].lines == self.clues[id_].lines:
+                    self.rendered[id_] = surface
+
+        self.scroll_pos.y = previous.scroll_pos.y
+        self.clamp_scroll()
+
+    def clamp_scroll(self) -> None:
+        min_pos: int = min(self.window.get_height() - self.height, 0)
+        self.scroll_pos.y = min(max(self.scroll_pos.y, min_pos), 0)
 
     def clear_selection(self) -> None:
         for clue in self.clues.values():
             clue.is_selected = False
 
+        self.drawn_scroll = None
+        self.dirty = True
+
     def get_collided(self, mouse_pos: Vector2) -> Optional[ClueDisplay]:
         if not self.window_placement.collidepoint(mouse_pos):
             return None
 
-        mouse_pos -= self.window_placement.topleft
-        mouse_pos.y -= self.scroll_pos.y
-        for clue in self.clues.values():
-            if clue.placement.collidepoint(mouse_pos):
-                return clue
+        local_pos: Vector2 = mouse_pos - self.window_placement.topleft
+        local_pos.y -= self.scroll_pos.y
 
-        return None
+        # clues are stacked top to bottom in id order, so the candidate is the last one starting above the mouse
+        position: int = bisect_right(self.tops, local_pos.y) - 1
+        if position < 0:
+            return None
 
-    def render_selected(self) -> None:
-        for clue in self.clues.values():
-            if not clue.is_selected:
-                continue
+        clue: ClueDisplay = self.clues[self.ids[position]]
+        return clue if clue.placement.collidepoint(local_pos) else None
+
+    def _get_surface(self, clue: ClueDisplay) -> Surface:
+        surface: Optional[Surface] = self.rendered.get(clue.id)
+        if surface is not None:
+            self.rendered.move_to_end(clue.id)
+            return surface
 
-            self.window.blit(
-                clue.hover_surface,
-                clue.placement.topleft + self.scroll_pos
-            )
+        surface = multi_line_render(clue.lines, self.window.get_width(), self.font)
+        self.rendered[clue.id] = surface
+        if len(self.rendered) > CLUE_SURFACE_CACHE_SIZE:
+            self.rendered.popitem(last=False)
+
+        return surface
+
+    def _draw_strip(self, top: int, bottom: int) -> None:
+        strip: Rect = Rect(0, top, self.window.get_width(), bottom - top)
+        self.window.set_clip(strip)
+        self.window.fill("white", strip)
+
+        content_top: float = top - self.scroll_pos.y
+        content_bottom: float = bottom - self.scroll_pos.y
+        for position in range(max(bisect_right(self.tops, content_top) - 1, 0), len(self.ids)):
+            clue: ClueDisplay = self.clues[self.ids[position]]
+            if clue.placement.top >= content_bottom:
+                break
+
+            destination: Vector2 = clue.placement.topleft + self.scroll_pos
+            self.window.blit(self._get_surface(clue), destination)
+            if clue.is_selected:
+                self.window.blit(self.hover_surface, destination, Rect((0, 0), clue.placement.size))
+
+        self.window.set_clip(None)
 
     def scroll(self, direction: ScrollDirection) -> None:
         dir_mult: int = 1 if direction == ScrollDirection.UP else -1
         speed: int = 18
         next_pos: int = self.scroll_pos.y + (speed * dir_mult)
 
-        min_pos: int = (self.surface.get_height() - self.window.get_height()) * -1
+        min_pos: int = (self.height - self.window.get_height()) * -1
         if next_pos >= 0:
             next_pos = 0
 
         elif next_pos <= min_pos:
             next_pos = min_pos
 
+        if next_pos != self.scroll_pos.y:
+            self.dirty = True
+
         self.scroll_pos.y = next_pos
 
+    def render(self) -> None:
+        window_height: int = self.window.get_height()
+        offset: Optional[float] = None if self.drawn_scroll is None else self.scroll_pos.y - self.drawn_scroll
+
+        if offset is None or abs(offset) >= window_height:
+            self._draw_strip(0, window_height)
+
+        elif offset > 0:
+            # content moved down, so only the strip uncovered at the top needs drawing
+            self.window.scroll(0, int(offset))
+            self._draw_strip(0, int(offset))
+
+        elif offset < 0:
+            self.window.scroll(0, int(offset))
+            self._draw_strip(window_height + int(offset), window_height)
+
+        self.drawn_scroll = self.scroll_pos.y
+        self.dirty = False
+
+
+def _hover_surface(window: Surface) -> Surface:
+    hover: Surface = Surface(window.get_size())
+    hover.fill("black")
+    hover.set_alpha(HOVER_ALPHA)
+    return hover
+
+
+def lines_height(lines: list[str], font: Font) -> int:
+    return sum([text_size(font, ln)[1] for ln in lines]) + LINE_SEP
+
 
 def multi_line_render(lines: list[str], max_width: int, font: Font) -> Surface:
-    surface: Surface = Surface((
-        max_width,
-        sum([Vector2(font.size(ln)).y for ln in lines]) + LINE_SEP,
-    ))
+    surface: Surface = Surface((max_width, lines_height(lines, font)))
     surface.fill("white")
     prev_placement: Optional[Rect] = None
     for line in lines:
-        surf: Surface = font.render(line, True, "black")
+        surf: Surface = render_text(font, line, "black")
 
         placement: Rect = surf.get_rect(topleft=(0, 0))
         if prev_placement is not None:
@@ -139,24 +233,41 @@ def multi_line_render(lines: list[str], max_width: int, font: Font) -> Surface:
     return surface
 
 
-def split_text(text: str, max_width: int, font: Font) -> list[str]:
+def split_text(text: str, max_width: int, font: Font, word_widths: Optional[dict[str, int]] = None) -> list[str]:
     lines: list[str] = []
     line: str = ""
+    line_width: int = 0
+    word_widths = {} if word_widths is None else word_widths
 
-    def get_render_size(data: str) -> Vector2:
-        return Vector2(font.size(data))
+    def get_width(data: str) -> int:
+        if (width := word_widths.get(data)) is None:
+            width = text_size(font, data)[0]
+            word_widths[data] = width
 
+        return width
+
+    space_width: int = get_width(" ")
+    # summing word widths ignores kerning and rounding at every join, so the sum drifts from the real width
+    # by up to a space per word summed since the last exact measurement, lines that could end within that
+    # drift of the edge are measured exactly
+    drift: int = 0
     for word in text.split():
-        sep: str = " " if line else ""
-        next_line: str = line + sep + word
+        next_width: int = line_width + space_width + get_width(word) if line else get_width(word)
+        next_drift: int = drift + space_width if line else 0
+        if line and abs(next_width - max_width) <= next_drift:
+            next_width = text_size(font, line + " " + word)[0]
+            next_drift = 0
 
-        render_size: Vector2 = get_render_size(next_line)
-        if render_size.x > max_width:
+        if next_width > max_width:
             lines.append(line)
             line = word
+            line_width = get_width(word)
+            drift = 0
 
         else:
-            line = next_line
+            line = line + (" " if line else "") + word
+            line_width = next_width
+            drift = next_drift
 
     if line not in lines:
         lines.append(line)
@@ -165,19 +276,7 @@ def split_text(text: str, max_width: int, font: Font) -> list[str]:
 
 
 def get_max_size(longest: str, max_lines: int, font_name: str, max_width) -> int:
-    size: int = 0
-    font: Font = SysFont(font_name, size)
-
-    def get_render_size() -> Vector2:
-        return Vector2(font.size(longest))
-
-    render_size: Vector2 = get_render_size()
-    while (render_size.x // max_width) < max_lines:
-        size += 1
-        font = SysFont(font_name, size)
-        render_size = get_render_size()
-
-    return size
+    return get_smallest_size(font_name, longest, math.ceil(max_lines * max_width))
 
 
 @dataclass(slots=True, init=False)
@@ -187,8 +286,10 @@ class CluesDisplay:
 
     across: ClueSet
     down: ClueSet
+    word_widths: dict[str, int]
 
-    def __init__(self, parent: Surface, date_placement: Rect, padding: Vector2, clues: Clues) -> None:
+    def __init__(self, parent: Surface, date_placement: Rect, padding: Vector2, clues: Clues,
+                 previous: Optional["CluesDisplay"] = None) -> None:
         surface: Surface = Surface((
             parent.get_width() - padding.x * 2,
             parent.get_height() - Vector2(date_placement.midbottom).y - padding.y * 2
@@ -208,26 +309,45 @@ class CluesDisplay:
             list(clues.across.values()) + list(clues.down.values()),
             key=lambda clue: len(clue)
         )
-        font_name: str = get_fonts()[0]
+        font_name: str = default_font_name()
         clue_font_size: int = get_max_size(longest_clue, max_lines, font_name, size.x)
-        clue_font: Font = SysFont(font_name, clue_font_size)
+        clue_font: Font = get_font(clue_font_size, font_name)
+        # word widths only depend on the font, so a relayout keeps them while the font stays
+        same_font: bool = previous is not None and previous.across.font is clue_font
+        word_widths: dict[str, int] = previous.word_widths if same_font else {}
 
         across_window: Surface = Surface(size)
         across_window.fill("white")
         across_placement: Rect = across_window.get_rect(topleft=padding)
-        across: ClueSet = ClueSet(across_window, across_placement, clues.across, clue_font)
+        across: ClueSet = self._clue_set(across_window, across_placement, clues.across, clue_font, word_widths,
+                                         previous.across if previous is not None else None)
 
         down_window: Surface = Surface(size)
         down_window.fill("white")
         down_placement: Rect = down_window.get_rect(topleft=across.window_placement.topright)
         down_placement.x += padding.x
-        down: ClueSet = ClueSet(down_window, down_placement, clues.down, clue_font)
+        down: ClueSet = self._clue_set(down_window, down_placement, clues.down, clue_font, word_widths,
+                                       previous.down if previous is not None else None)
 
         self.surface = surface
         self.placement = placement
 
         self.across = across
         self.down = down
+        self.word_widths = word_widths
+
+    @staticmethod
+    def _clue_set(window: Surface, window_placement: Rect, clue_set: dict[int, str], font: Font,
+                  word_widths: dict[str, int], previous: Optional[ClueSet]) -> ClueSet:
+        if previous is not None and previous.font is font and previous.window.get_width() == window.get_width():
+            previous.reframe(window, window_placement)
+            return previous
+
+        created: ClueSet = ClueSet(window, window_placement, clue_set, font, word_widths)
+        if previous is not None:
+            created.keep_view(previous)
+
+        return created
 
     def set_selected(self, across: Optional[int] = None, down: Optional[int] = None) -> None:
         self.across.clear_selection()
@@ -243,6 +363,7 @@ class CluesDisplay:
 @dataclass(slots=True, init=False)
 class MetadataDisplay:
     is_default_title: bool
+    dirty: bool
 
     surface: Surface
     placement: Rect
@@ -255,31 +376,29 @@ class MetadataDisplay:
 
     clues_display: CluesDisplay
 
-    def __init__(self, board_placement: Rect, state: CrossWordState) -> None:
-        window_rect: Rect = pygame.display.get_surface().get_rect()
+    def __init__(self, layout: Layout, state: CrossWordState, previous: Optional["MetadataDisplay"] = None) -> None:
         is_default_title: bool = state.puzzle.title.startswith("NY TIMES")
-        font_name: str = get_fonts()[0]
+        font_name: str = default_font_name()
 
-        padding: Vector2 = Vector2(board_placement.topleft)
-        top_left: Vector2 = Vector2(board_placement.topright)
-        top_left.x += padding.x
+        padding: Vector2 = layout.padding
+        placement: Rect = layout.metadata_placement
 
         # creating main surface
-        width: int = window_rect.width - top_left.x - padding.x
-        height: int = window_rect.height - padding.y * 2
+        width: int = placement.width
+        height: int = placement.height
         surface: Surface = Surface((width, height))
         surface.fill("white")
 
         title_font_size: int = get_desired_font_size(font_name, state.puzzle.title,
                                                      math.floor(width * 0.6))
-        title_font: Font = SysFont(font_name, title_font_size)
-        title: Surface = title_font.render(state.puzzle.title, True, "black", "white")
+        title_font: Font = get_font(title_font_size, font_name)
+        title: Surface = render_text(title_font, state.puzzle.title, "black", "white")
 
         date_width_factor: float = 0.4 if is_default_title else 0.2
         date_font_size: int = get_desired_font_size(font_name, state.puzzle.date,
                                                     math.floor(width * date_width_factor))
-        date_font: Font = SysFont(font_name, date_font_size)
-        date: Surface = date_font.render(state.puzzle.date, True, "black", "white")
+        date_font: Font = get_font(date_font_size, font_name)
+        date: Surface = render_text(date_font, state.puzzle.date, "black", "white")
 
         title_placement: Rect = title.get_rect(midtop=(width // 2, padding.y))
 
@@ -295,12 +414,14 @@ class MetadataDisplay:
             date_placement.y += padding.y
             surface.blit(date, date_placement)
 
-        clues_display: CluesDisplay = CluesDisplay(surface, date_placement, padding, state.puzzle.clues)
+        clues_display: CluesDisplay = CluesDisplay(surface, date_placement, padding, state.puzzle.clues,
+                                                   previous.clues_display if previous is not None else None)
 
         self.is_default_title = is_default_title
+        self.dirty = True
 
         self.surface = surface
-        self.placement = surface.get_rect(topleft=top_left)
+        self.placement = placement
 
         self.title = title
         self.title_placement = title_placement
@@ -310,34 +431,65 @@ class MetadataDisplay:
 
         self.clues_display = clues_display
 
-    def render(self) -> None:
-        self.clues_display.across.window.fill("white")
-        self.clues_display.down.window.fill("white")
-        self.clues_display.across.window.blit(self.clues_display.across.surface, self.clues_display.across.scroll_pos)
-        self.clues_display.down.window.blit(self.clues_display.down.surface, self.clues_display.down.scroll_pos)
+    def render(self) -> list[Rect]:
+        updated: list[Rect] = []
+        for clue_set in (self.clues_display.across, self.clues_display.down):
+            if not clue_set.dirty:
+                continue
 
-        self.clues_display.across.render_selected()
-        self.clues_display.down.render_selected()
+            clue_set.render()
+            self.clues_display.surface.blit(clue_set.window, clue_set.window_placement)
+            placement: Rect = clue_set.window_placement.move(self.clues_display.placement.topleft)
+            updated.append(self.surface.blit(clue_set.window, placement))
 
-        self.clues_display.surface.blit(self.clues_display.across.window, self.clues_display.across.window_placement)
-        self.clues_display.surface.blit(self.clues_display.down.window, self.clues_display.down.window_placement)
+        if self.dirty:
+            self.surface.blit(self.clues_display.surface, self.clues_display.placement)
+            self.dirty = False
+            return [self.surface.get_rect()]
 
-        self.surface.blit(self.clues_display.surface, self.clues_display.placement)
+        return updated
 
 
 def get_desired_font_size(font_name: str, text: str, desired_width: int) -> Optional[int]:
-    font_size: int = 1
-    font: Font = SysFont(font_name, font_size)
+    return get_smallest_size(font_name, text, desired_width)
 
-    def get_render_size() -> Vector2:
-        return Vector2(font.size(text))
 
-    render_size: Vector2 = get_render_size()
+def get_smallest_size(font_name: str, text: str, min_width: int) -> int:
+    if (cached := LAYOUT_CACHE.get(font_name, text, min_width)) is not None:
+        return cached
 
-    while render_size.x < desired_width:
-        font_size += 1
+    def is_wide_enough(size: int) -> bool:
+        return measure_width(size, text, font_name) >= min_width
 
-        font = SysFont(font_name, font_size)
-        render_size = get_render_size()
+    # width grows roughly linearly with size, so a cached reference font gives a close first guess
+    reference_width: int = max(text_size(get_font(REFERENCE_FONT_SIZE, font_name), text)[0], 1)
+    estimate: int = min(max(math.ceil(REFERENCE_FONT_SIZE * min_width / reference_width), 1), MAX_FONT_SIZE)
+
+    # gallop away from the estimate until the answer is bracketed by (low, high], then bisect
+    step: int = 1
+    if is_wide_enough(estimate):
+        low, high = estimate - 1, estimate
+        while low >= 1 and is_wide_enough(low):
+            high = low
+            step *= 2
+            low = high - step
+
+        low = max(low, 0)
+
+    else:
+        low, high = estimate, min(estimate + 1, MAX_FONT_SIZE)
+        while high < MAX_FONT_SIZE and not is_wide_enough(high):
+            low = high
+            step *= 2
+            high = min(low + step, MAX_FONT_SIZE)
+
+    while high - low > 1:
+        middle: int = (low + high) // 2
+        if is_wide_enough(middle):
+            high = middle
+
+        else:
+            low = middle
 
-    return font_size
+    LAYOUT_CACHE.set(font_name, text, min_width, high)
+    return high
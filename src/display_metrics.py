@@ -0,0 +1,50 @@
+import pygame
+from pygame.font import Font
+from pygame.rect import Rect
+from pygame.surface import Surface
+
+from config import LINE_SEP, METRICS_FONT_SIZE, PADDING
+from fonts import get_font, render_text, text_size
+from metrics import Metrics
+
+OVERLAY_HEADER: str = f"{'timer':<16}{'p50':>8}{'p99':>8}{'max':>8}"
+
+
+class MetricsOverlay:
+
+    def __init__(self, metrics: Metrics) -> None:
+        self._metrics: Metrics = metrics
+        self._font: Font = get_font(METRICS_FONT_SIZE, "monospace")
+        self._placement: Rect = Rect(PADDING, PADDING, 0, 0)
+
+    @property
+    def placement(self) -> Rect:
+        return self._placement
+
+    def _lines(self) -> list[str]:
+        lines: list[str] = []
+        frame: float = self._metrics.histogram("frame").percentile(0.5)
+        # frames are timed without the idle wait, so this is the rate the work alone would allow
+        lines.append(f"max fps {round(1000 / frame) if frame else '-'}")
+        lines.append(OVERLAY_HEADER)
+        for name, summary in self._metrics.summaries().items():
+            lines.append(f"{name:<16}{summary['p50']:>8.2f}{summary['p99']:>8.2f}{summary['max']:>8.2f}")
+
+        return lines
+
+    def render(self, screen: Surface) -> Rect:
+        lines: list[str] = self._lines()
+        line_height: int = self._font.get_linesize() + LINE_SEP
+        width: int = max(text_size(self._font, line)[0] for line in lines) + PADDING * 4
+
+        # the panel only grows, so a shorter frame never leaves stale text behind it
+        self._placement = self._placement.union(Rect(PADDING, PADDING, width, line_height * len(lines) + PADDING * 4))
+        pygame.draw.rect(screen, "black", self._placement)
+        pygame.draw.rect(screen, "yellow", self._placement, 1)
+
+        y: int = self._placement.top + PADDING * 2
+        for line in lines:
+            screen.blit(render_text(self._font, line, "yellow"), (self._placement.left + PADDING * 2, y))
+            y += line_height
+
+        return self._placement
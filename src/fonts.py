@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from functools import cache, lru_cache
+from threading import RLock
+from typing import Optional
+
+from pygame.font import Font, SysFont, get_fonts
+from pygame.surface import Surface
+
+from config import GLYPH_CACHE_SIZE, MEASURE_CACHE_SIZE
+
+# fonts are shared between the render thread and the prefetch worker, so every font call goes through this lock
+FONT_LOCK: RLock = RLock()
+
+_fonts: dict[tuple[str, int], Font] = {}
+
+
+@cache
+def default_font_name() -> str:
+    return get_fonts()[0]
+
+
+def get_font(size: int, name: Optional[str] = None) -> Font:
+    key: tuple[str, int] = (name or default_font_name(), size)
+    with FONT_LOCK:
+        font: Optional[Font] = _fonts.get(key)
+        if font is None:
+            font = SysFont(*key)
+            _fonts[key] = font
+
+    return font
+
+
+@lru_cache(maxsize=MEASURE_CACHE_SIZE)
+def measure_width(size: int, text: str, name: Optional[str] = None) -> int:
+    # probe fonts are thrown away so size searches do not fill the registry with unused sizes,
+    # their widths are kept since a resize searches the same text again for a slightly different width
+    with FONT_LOCK:
+        return SysFont(name or default_font_name(), size).size(text)[0]
+
+
+def render_text(font: Font, text: str, color: str, background: Optional[str] = None) -> Surface:
+    with FONT_LOCK:
+        return font.render(text, True, color, background)
+
+
+def text_size(font: Font, text: str) -> tuple[int, int]:
+    with FONT_LOCK:
+        return font.size(text)
+
+
+class GlyphCache:
+
+    def __init__(self, capacity: int = GLYPH_CACHE_SIZE) -> None:
+        self._capacity: int = capacity
+        self._glyphs: OrderedDict[tuple[str, int, str, str, str], Surface] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._glyphs)
+
+    def render(self, text: str, size: int, color: str, background: str, name: Optional[str] = None) -> Surface:
+        key: tuple[str, int, str, str, str] = (name or default_font_name(), size, text, color, background)
+        with FONT_LOCK:
+            glyph: Optional[Surface] = self._glyphs.get(key)
+            if glyph is not None:
+                self._glyphs.move_to_end(key)
+                return glyph
+
+            glyph = get_font(size, name).render(text, True, color, background)
+            self._glyphs[key] = glyph
+            if len(self._glyphs) > self._capacity:
+                self._glyphs.popitem(last=False)
+
+        return glyph
+
+
+GLYPHS: GlyphCache = GlyphCache()
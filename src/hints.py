@@ -0,0 +1,157 @@
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Thread
+from typing import NamedTuple, Optional, Sequence
+
+from config import CORPUS_INDEX_PATH, DATA_PATH, HINT_BATCH_SIZE, HINT_LIMIT
+from corpus_index import CorpusIndex
+from puzzle_reader import EMPTY_CELL, Puzzle
+from word_index import Entry, WordIndex, iter_bits
+
+
+class HintRequest(NamedTuple):
+    id: int
+    puzzle: Puzzle
+    values: list[str]
+    direction: str
+    clue_id: int
+
+
+class HintBatch(NamedTuple):
+    request: int
+    words: list[tuple[str, int]]
+    done: bool
+
+
+def word_cells(puzzle: Puzzle, direction: str, clue_id: int) -> range:
+    if direction == "down":
+        return puzzle.clues.by_index.down_cells[clue_id]
+
+    return puzzle.clues.by_index.across_cells[clue_id]
+
+
+def candidate_bits(index: WordIndex, puzzle: Puzzle, values: Sequence[str], direction: str, clue_id: int) -> int:
+    cells: range = word_cells(puzzle, direction, clue_id)
+    bits: int = index.match([values[cell] for cell in cells])
+
+    crossing_direction: str = "across" if direction == "down" else "down"
+    crossing_ids: Sequence[int] = puzzle.clues.by_index.across if direction == "down" else puzzle.clues.by_index.down
+    for position, cell in enumerate(cells):
+        if not bits:
+            break
+
+        if values[cell] != EMPTY_CELL:
+            continue
+
+        # the open cell can only take letters that still leave the crossing word some candidates
+        crossing: range = word_cells(puzzle, crossing_direction, crossing_ids[cell])
+        crossing_bits: int = index.match([values[crossing_cell] for crossing_cell in crossing])
+        if not crossing_bits:
+            # the crossing is already outside the corpus, most likely a wrong letter, so it can not narrow anything
+            continue
+
+        letters: dict[str, int] = index.letters(len(cells), position)
+        allowed: int = 0
+        for letter, letter_bits in index.letters(len(crossing), crossing.index(cell)).items():
+            if crossing_bits & letter_bits:
+                allowed |= letters.get(letter, 0)
+
+        bits &= allowed
+
+    return bits
+
+
+class HintEngine:
+
+    def __init__(self, source: Path, index_path: Optional[Path] = None, limit: int = HINT_LIMIT,
+                 batch_size: int = HINT_BATCH_SIZE) -> None:
+        self._source: Path = source
+        self._index_path: Optional[Path] = index_path
+        self._limit: int = limit
+        self._batch_size: int = batch_size
+        self._index: Optional[CorpusIndex] = None
+        self._requests: Queue[Optional[HintRequest]] = Queue()
+        self._results: Queue[HintBatch] = Queue()
+        self._latest: int = 0
+        self._thread: Optional[Thread] = None
+
+        self.error: Optional[str] = None
+
+    def start(self, source: Optional[Path] = None) -> None:
+        if self._thread is not None:
+            return
+
+        # the app passes the pack or directory its catalog reads, so hints come from the same puzzles
+        if source is not None:
+            self._source = source
+
+        # the index loads on the worker, so opening the window never waits for it
+        self._thread = Thread(target=self._run, name="hints", daemon=True)
+        self._thread.start()
+
+    def request(self, puzzle: Puzzle, values: Sequence[str], direction: str, clue_id: int) -> int:
+        self.start()
+        self._latest += 1
+        self._requests.put(HintRequest(self._latest, puzzle, list(values), direction, clue_id))
+        return self._latest
+
+    def poll(self, request: int) -> list[HintBatch]:
+        batches: list[HintBatch] = []
+        while True:
+            try:
+                batch: HintBatch = self._results.get_nowait()
+
+            except Empty:
+                return batches
+
+            if batch.request == request:
+                batches.append(batch)
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._requests.put(None)
+
+    def _run(self) -> None:
+        try:
+            self._index = CorpusIndex.open(self._source, self._index_path)
+
+        except (OSError, ValueError) as error:
+            # without an index every request still gets its finished batch, so nothing waits on hints forever
+            self.error = str(error)
+
+        while (request := self._requests.get()) is not None:
+            # only the newest request matters, older ones were for a selection that is gone
+            if request.id != self._latest:
+                continue
+
+            if self._index is None:
+                self._results.put(HintBatch(request.id, [], True))
+
+            else:
+                self._stream(request)
+
+    def _stream(self, request: HintRequest) -> None:
+        words: WordIndex = self._index.words
+        length: int = len(word_cells(request.puzzle, request.direction, request.clue_id))
+        bits: int = candidate_bits(words, request.puzzle, request.values, request.direction, request.clue_id)
+
+        batch: list[tuple[str, int]] = []
+        sent: int = 0
+        for position in iter_bits(bits):
+            if request.id != self._latest:
+                return
+
+            entry: Entry = words.decode(length, 1 << position)[0]
+            batch.append(("".join(entry), words.frequency(entry)))
+            sent += 1
+            if sent >= self._limit:
+                break
+
+            if len(batch) >= self._batch_size:
+                self._results.put(HintBatch(request.id, batch, False))
+                batch = []
+
+        self._results.put(HintBatch(request.id, batch, True))
+
+
+HINTS: HintEngine = HintEngine(Path(DATA_PATH), Path(CORPUS_INDEX_PATH))
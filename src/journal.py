@@ -0,0 +1,160 @@
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, NamedTuple, Optional
+
+import pygame
+from pygame.event import Event
+
+from config import JOURNAL_ENABLED, JOURNAL_PATH
+from puzzle_reader import date_key, key_date
+from save_state import Snapshot, encode_snapshot
+
+JOURNAL_MAGIC: bytes = b"XWJN"
+JOURNAL_VERSION: int = 2
+# version 1 journals have no snapshot records and read the same way
+OLDEST_JOURNAL_VERSION: int = 1
+
+# magic, version
+JOURNAL_HEADER: struct.Struct = struct.Struct("<4sH")
+# milliseconds since the journal started, kind, three kind specific fields
+RECORD: struct.Struct = struct.Struct("<IBIII")
+
+# a puzzle record carries the date key and the window size it was laid out for, journals from before
+# the window could resize leave the size zero
+PUZZLE_RECORD: int = 0
+KEY_RECORD: int = 1
+CLICK_RECORD: int = 2
+# width and height of a relayout, clicks after it land on the cells of the new layout
+RESIZE_RECORD: int = 3
+# the grid a shown puzzle starts from, saved progress included, the first field is the length of the
+# encoded snapshot that follows the record
+SNAPSHOT_RECORD: int = 4
+
+
+class JournalEntry(NamedTuple):
+    time_ms: int
+    kind: int
+    a: int
+    b: int
+    c: int
+    data: bytes = b""
+
+
+def encode_event(time_ms: int, event: Event) -> Optional[JournalEntry]:
+    if event.type == pygame.KEYDOWN:
+        return JournalEntry(time_ms, KEY_RECORD, event.key, ord(event.unicode) if event.unicode else 0, event.mod)
+
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        return JournalEntry(time_ms, CLICK_RECORD, event.pos[0], event.pos[1], event.button)
+
+    # nothing else reaches CrossWords state
+    return None
+
+
+def decode_event(entry: JournalEntry) -> Event:
+    if entry.kind == KEY_RECORD:
+        return Event(pygame.KEYDOWN, key=entry.a, unicode=chr(entry.b) if entry.b else "", mod=entry.c,
+                     scancode=0)
+
+    if entry.kind == CLICK_RECORD:
+        return Event(pygame.MOUSEBUTTONDOWN, pos=(entry.a, entry.b), button=entry.c)
+
+    raise ValueError(f"Journal entry of kind {entry.kind} is not an input event")
+
+
+def puzzle_date(entry: JournalEntry) -> str:
+    return key_date(entry.a)
+
+
+def read_journal(path: Path) -> Iterator[JournalEntry]:
+    with open(path.absolute(), "rb") as journal_file:
+        data: bytes = journal_file.read()
+
+    magic, version = JOURNAL_HEADER.unpack_from(data) if len(data) >= JOURNAL_HEADER.size else (b"", 0)
+    if magic != JOURNAL_MAGIC or not OLDEST_JOURNAL_VERSION <= version <= JOURNAL_VERSION:
+        raise ValueError(f"{path} is not a version {JOURNAL_VERSION} input journal")
+
+    # a session that crashed mid write leaves a partial record, which is dropped
+    offset: int = JOURNAL_HEADER.size
+    while offset + RECORD.size <= len(data):
+        fields: tuple[int, ...] = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if fields[1] != SNAPSHOT_RECORD:
+            yield JournalEntry(*fields)
+            continue
+
+        if offset + fields[2] > len(data):
+            return
+
+        yield JournalEntry(*fields, data[offset:offset + fields[2]])
+        offset += fields[2]
+
+
+def encode_entry(entry: JournalEntry) -> bytes:
+    return RECORD.pack(*entry[:5]) + entry.data
+
+
+def write_journal(path: Path, entries: list[JournalEntry]) -> None:
+    with open(path.absolute(), "wb") as journal_file:
+        journal_file.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION))
+        journal_file.write(b"".join(encode_entry(entry) for entry in entries))
+
+
+class Journal:
+
+    def __init__(self, path: Path, enabled: bool = JOURNAL_ENABLED) -> None:
+        self._path: Path = path
+        self._file: Optional[BinaryIO] = None
+        self._start: float = 0.0
+        self._date: Optional[str] = None
+        self._size: tuple[int, int] = (0, 0)
+        self.enabled: bool = enabled
+
+    def _time_ms(self) -> int:
+        if self._file is None:
+            self._file = open(self._path.absolute(), "wb")
+            self._file.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION))
+            self._start = time.perf_counter()
+
+        return int((time.perf_counter() - self._start) * 1000)
+
+    def show(self, date: str, size: tuple[int, int], snapshot: Callable[[], Snapshot]) -> None:
+        # a shown puzzle may resume saved progress or a visit earlier in the session, so replay needs
+        # the grid it starts from and not just the date
+        if not self.enabled:
+            return
+
+        time_ms: int = self._time_ms()
+        payload: bytes = encode_snapshot(snapshot())
+        self._date = date
+        self._size = size
+        self._file.write(RECORD.pack(time_ms, PUZZLE_RECORD, date_key(date), *size))
+        self._file.write(RECORD.pack(time_ms, SNAPSHOT_RECORD, len(payload), 0, 0) + payload)
+
+    def record(self, date: str, size: tuple[int, int], event: Event) -> None:
+        if not self.enabled:
+            return
+
+        time_ms: int = self._time_ms()
+        if date != self._date:
+            self._date = date
+            self._size = size
+            self._file.write(RECORD.pack(time_ms, PUZZLE_RECORD, date_key(date), *size))
+
+        elif size != self._size:
+            self._size = size
+            self._file.write(RECORD.pack(time_ms, RESIZE_RECORD, *size, 0))
+
+        entry: Optional[JournalEntry] = encode_event(time_ms, event)
+        if entry is not None:
+            # buffered, a record costs a pack and a memory copy until the buffer fills
+            self._file.write(encode_entry(entry))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+JOURNAL: Journal = Journal(Path(JOURNAL_PATH))
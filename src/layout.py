@@ -0,0 +1,52 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from pygame.math import Vector2
+from pygame.rect import Rect
+
+from config import BOARD_PADDING, LAYOUT_MEMO_SIZE, MIN_METADATA_WIDTH, MIN_WINDOW_HEIGHT, MIN_WINDOW_WIDTH
+
+
+class Layout(NamedTuple):
+    # plain tuples, memoized layouts are shared so nothing may move them in place
+    cell: tuple[int, int]
+    board: tuple[int, int, int, int]
+    metadata: tuple[int, int, int, int]
+
+    @property
+    def cell_size(self) -> Vector2:
+        return Vector2(self.cell)
+
+    @property
+    def board_placement(self) -> Rect:
+        return Rect(self.board)
+
+    @property
+    def metadata_placement(self) -> Rect:
+        return Rect(self.metadata)
+
+    @property
+    def padding(self) -> Vector2:
+        return Vector2(self.board[:2])
+
+
+@lru_cache(maxsize=LAYOUT_MEMO_SIZE)
+def compute_layout(rows: int, cols: int, width: int, height: int) -> Layout:
+    # below the minimum the layout stops shrinking and the window just clips it
+    width = max(width, MIN_WINDOW_WIDTH)
+    height = max(height, MIN_WINDOW_HEIGHT)
+
+    # the board is the largest square that still leaves the clues their minimum width
+    min_size: int = min(width - MIN_METADATA_WIDTH, height) - BOARD_PADDING * 2
+    cell: tuple[int, int] = (min_size // rows, min_size // cols)
+    board_width: int = cell[0] * rows
+    board_height: int = cell[1] * cols
+    offset: int = BOARD_PADDING + (min_size - board_width) // 2
+
+    # the clue panel sits right of the board, inset by the same padding the board has
+    left: int = offset + board_width + offset
+    return Layout(
+        cell,
+        (offset, offset, board_width, board_height),
+        (left, offset, width - left - offset, height - offset * 2)
+    )
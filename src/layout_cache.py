@@ -0,0 +1,88 @@
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Optional
+
+from config import LAYOUT_CACHE_PATH, LAYOUT_CACHE_SIZE
+
+LAYOUT_CACHE_VERSION: int = 1
+
+
+class LayoutCache:
+
+    def __init__(self, path: Path, capacity: int = LAYOUT_CACHE_SIZE) -> None:
+        self._path: Path = path
+        self._capacity: int = capacity
+        self._lock: Lock = Lock()
+        # least recently used first, every window width adds entries so the oldest widths are dropped
+        self._sizes: Optional[OrderedDict[str, int]] = None
+        self._changed: bool = False
+
+    @staticmethod
+    def _key(font_name: str, text: str, width: int) -> str:
+        return f"{font_name}\x1f{width}\x1f{text}"
+
+    def _load(self) -> OrderedDict[str, int]:
+        if self._sizes is not None:
+            return self._sizes
+
+        self._sizes = OrderedDict()
+        if self._path.exists():
+            try:
+                with open(self._path.absolute(), "r") as cache_file:
+                    cache: dict[str, Any] = json.load(cache_file)
+
+            except (OSError, ValueError):
+                cache = {}
+
+            if cache.get("version") == LAYOUT_CACHE_VERSION:
+                # entries are saved in use order, so a file from before the bound keeps its newest entries
+                self._sizes = OrderedDict(list(cache["sizes"].items())[-self._capacity:])
+
+        return self._sizes
+
+    def get(self, font_name: str, text: str, width: int) -> Optional[int]:
+        key: str = self._key(font_name, text, width)
+        with self._lock:
+            sizes: OrderedDict[str, int] = self._load()
+            size: Optional[int] = sizes.get(key)
+            if size is not None:
+                sizes.move_to_end(key)
+
+            return size
+
+    def set(self, font_name: str, text: str, width: int, size: int) -> None:
+        key: str = self._key(font_name, text, width)
+        with self._lock:
+            sizes: OrderedDict[str, int] = self._load()
+            sizes[key] = size
+            sizes.move_to_end(key)
+            while len(sizes) > self._capacity:
+                sizes.popitem(last=False)
+
+            self._changed = True
+
+    def save(self) -> None:
+        # only the copy is taken under the lock, lookups from other threads never wait on the write
+        with self._lock:
+            if not self._changed:
+                return
+
+            sizes: dict[str, int] = dict(self._sizes)
+            self._changed = False
+
+        temporary: Path = self._path.with_name(self._path.name + ".tmp")
+        try:
+            with open(temporary.absolute(), "w") as cache_file:
+                json.dump({"version": LAYOUT_CACHE_VERSION, "sizes": sizes}, cache_file)
+
+            os.replace(temporary, self._path)
+
+        except OSError:
+            # the cache only saves work, an unwritable location just means searching again next run
+            pass
+
+
+LAYOUT_CACHE: LayoutCache = LayoutCache(Path(LAYOUT_CACHE_PATH))
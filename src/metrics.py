@@ -0,0 +1,168 @@
+import csv
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Optional
+
+from config import METRICS_ENABLED, METRICS_EXPORT_INTERVAL_S, METRICS_PATH, METRICS_WINDOW
+
+# upper bounds in milliseconds, the last bucket takes everything slower
+HISTOGRAM_BOUNDS: list[float] = [0.5, 1, 2, 4, 8, 16, 33, 66, 133]
+
+_DISABLED: nullcontext = nullcontext()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered: list[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Histogram:
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count: int = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, milliseconds: float) -> None:
+        self._samples.append(milliseconds)
+        self.count += 1
+
+    def percentile(self, fraction: float) -> float:
+        return percentile(list(self._samples), fraction)
+
+    def buckets(self) -> list[int]:
+        counts: list[int] = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        for sample in self._samples:
+            counts[bisect_left(HISTOGRAM_BOUNDS, sample)] += 1
+
+        return counts
+
+    def summary(self) -> dict[str, float]:
+        samples: list[float] = list(self._samples)
+        return {
+            "count": self.count,
+            "window": len(samples),
+            "mean": round(sum(samples) / max(len(samples), 1), 4),
+            "p50": round(self.percentile(0.5), 4),
+            "p99": round(self.percentile(0.99), 4),
+            "max": round(max(samples, default=0.0), 4),
+        }
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram: Histogram = histogram
+        self._start: float = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, exc_type: Optional[type[BaseException]], exc: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self._histogram.add((time.perf_counter() - self._start) * 1000)
+
+
+class Metrics:
+
+    def __init__(self, path: Path, enabled: bool = METRICS_ENABLED,
+                 export_interval: float = METRICS_EXPORT_INTERVAL_S) -> None:
+        self._path: Path = path
+        self._export_interval: float = export_interval
+        self._histograms: dict[str, Histogram] = {}
+        self._last_export: float = time.monotonic()
+        self._collect: bool = enabled
+        self.enabled: bool = enabled
+        self.overlay: bool = False
+
+    def histogram(self, name: str) -> Histogram:
+        histogram: Optional[Histogram] = self._histograms.get(name)
+        if histogram is None:
+            histogram = Histogram()
+            self._histograms[name] = histogram
+
+        return histogram
+
+    def timer(self, name: str) -> AbstractContextManager[None]:
+        # disabled timers are one shared no-op, so instrumented code pays for a branch and nothing else
+        if not self.enabled:
+            return _DISABLED
+
+        return _Timer(self.histogram(name))
+
+    def record(self, name: str, milliseconds: float) -> None:
+        if self.enabled:
+            self.histogram(name).add(milliseconds)
+
+    def toggle_overlay(self) -> None:
+        # the overlay needs data, so showing it collects even when metrics are off in the config
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or self._collect
+
+    def summaries(self) -> dict[str, dict[str, float]]:
+        return {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+
+    def tick(self) -> None:
+        if not self.enabled or time.monotonic() - self._last_export < self._export_interval:
+            return
+
+        self.export()
+
+    def export(self) -> None:
+        self._last_export = time.monotonic()
+        if not self._histograms:
+            return
+
+        try:
+            if self._path.suffix == ".csv":
+                self._export_csv()
+
+            else:
+                self._export_json()
+
+        except OSError:
+            # metrics are diagnostics, failing to write them must never take the game down
+            pass
+
+    def _export_json(self) -> None:
+        report: dict[str, Any] = {
+            "time": round(time.time(), 3),
+            "bounds_ms": HISTOGRAM_BOUNDS,
+            "timers": {
+                name: summary | {"buckets": self._histograms[name].buckets()}
+                for name, summary in self.summaries().items()
+            },
+        }
+
+        temporary: Path = self._path.with_name(self._path.name + ".tmp")
+        with open(temporary.absolute(), "w") as metrics_file:
+            json.dump(report, metrics_file, indent=2)
+
+        os.replace(temporary, self._path)
+
+    def _export_csv(self) -> None:
+        # csv grows by one row per timer and export, which keeps a history a spreadsheet can plot
+        is_new: bool = not self._path.exists()
+        now: float = round(time.time(), 3)
+        rows: list[list[Any]] = [["time", "timer", "count", "window", "mean", "p50", "p99", "max"]] if is_new else []
+        for name, summary in self.summaries().items():
+            rows.append([now, name, summary["count"], summary["window"], summary["mean"], summary["p50"],
+                         summary["p99"], summary["max"]])
+
+        with open(self._path.absolute(), "a", newline="") as metrics_file:
+            csv.writer(metrics_file).writerows(rows)
+
+
+METRICS: Metrics = Metrics(Path(METRICS_PATH))
@@ -0,0 +1,164 @@
+import json
+from bisect import bisect_left
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+from puzzle_decoder import CATALOG_FIELDS, decode_puzzle_data, load_puzzle
+from puzzle_pack import PuzzlePack
+from puzzle_reader import Puzzle, create_puzzle, date_key, puzzle_files
+
+MANIFEST_VERSION: int = 1
+
+
+class CatalogEntry(NamedTuple):
+    source: str
+    date: str
+    dow: str
+    author: str
+    title: str
+
+
+class PuzzleCatalog:
+
+    @staticmethod
+    def from_directory(path: Path, manifest_path: Optional[Path] = None) -> "PuzzleCatalog":
+        known: dict[str, Any] = {}
+        if manifest_path is not None and manifest_path.exists():
+            with open(manifest_path.absolute(), "r") as manifest_file:
+                manifest: dict[str, Any] = json.load(manifest_file)
+
+            if manifest.get("version") == MANIFEST_VERSION:
+                known = manifest["files"]
+
+        files: dict[str, Any] = {}
+        entries: list[CatalogEntry] = []
+        rejected: list[str] = []
+        for day in puzzle_files(path):
+            source: str = day.relative_to(path).as_posix()
+            mtime: int = day.stat().st_mtime_ns
+
+            record: Optional[dict[str, Any]] = known.get(source)
+            if record is None or record["mtime"] != mtime:
+                record = {"mtime": mtime, "entry": _scan_file(day)}
+
+            files[source] = record
+            if record["entry"] is None:
+                rejected.append(source)
+                continue
+
+            entries.append(CatalogEntry(source, *record["entry"]))
+
+        if manifest_path is not None and files != known:
+            with open(manifest_path.absolute(), "w") as manifest_file:
+                json.dump({"version": MANIFEST_VERSION, "files": files}, manifest_file)
+
+        def load(entry: CatalogEntry) -> Puzzle:
+            puzzle: Optional[Puzzle] = load_puzzle(path / entry.source)
+
+            if puzzle is None:
+                raise ValueError(f"Puzzle was rejected since it was catalogued {entry.source}")
+
+            return puzzle
+
+        return PuzzleCatalog(sorted(entries, key=lambda entry: date_key(entry.date)), rejected, load)
+
+    @staticmethod
+    def from_pack(pack: PuzzlePack) -> "PuzzleCatalog":
+        # the pack is already sorted by date, entries are read from it only when asked for
+        return PuzzleCatalog(_PackEntries(pack), [], lambda entry: pack.load(int(entry.source)))
+
+    def __init__(self, entries: Sequence[CatalogEntry], rejected: list[str],
+                 loader: Callable[[CatalogEntry], Puzzle]) -> None:
+        self._entries: Sequence[CatalogEntry] = entries
+        self._loader: Callable[[CatalogEntry], Puzzle] = loader
+        self._position: int = -1
+
+        self.rejected: list[str] = rejected
+
+        # the day and author indexes cost a pass over every entry, so they are built on first use
+        self._by_dow: Optional[dict[str, list[int]]] = None
+        self._by_author: Optional[dict[str, list[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index: int) -> CatalogEntry:
+        return self._entries[index]
+
+    @property
+    def position(self) -> int:
+        return self._position
+
+    def find(self, date: str) -> Optional[int]:
+        key: int = date_key(date)
+        index: int = bisect_left(self._entries, key, key=lambda entry: date_key(entry.date))
+        if index < len(self._entries) and date_key(self._entries[index].date) == key:
+            return index
+
+        return None
+
+    def _build_indexes(self) -> None:
+        self._by_dow = {}
+        self._by_author = {}
+        for index, entry in enumerate(self._entries):
+            self._by_dow.setdefault(entry.dow, []).append(index)
+            self._by_author.setdefault(entry.author, []).append(index)
+
+    def by_dow(self, dow: str) -> list[int]:
+        if self._by_dow is None:
+            self._build_indexes()
+
+        return self._by_dow.get(dow, [])
+
+    def by_author(self, author: str) -> list[int]:
+        if self._by_author is None:
+            self._build_indexes()
+
+        return self._by_author.get(author, [])
+
+    def load(self, index: int) -> Puzzle:
+        return self._loader(self._entries[index])
+
+    def seek(self, index: int) -> Puzzle:
+        if not self._entries:
+            raise ValueError("Puzzle catalog is empty")
+
+        self._position = index % len(self._entries)
+        return self.load(self._position)
+
+    def next(self) -> Puzzle:
+        return self.seek(self._position + 1)
+
+    def previous(self) -> Puzzle:
+        return self.seek(self._position - 1 if self._position >= 0 else -1)
+
+
+class _PackEntries(Sequence[CatalogEntry]):
+
+    def __init__(self, pack: PuzzlePack) -> None:
+        self._pack: PuzzlePack = pack
+
+    def __len__(self) -> int:
+        return len(self._pack)
+
+    def __getitem__(self, position: int) -> CatalogEntry:
+        if position < 0:
+            position += len(self._pack)
+
+        title, date, author, dow = self._pack.entry(position)
+        return CatalogEntry(str(position), date, dow, author, title)
+
+
+def _scan_file(day: Path) -> Optional[list[str]]:
+    puzzle_data: dict[str, Any] = decode_puzzle_data(day.read_bytes(), CATALOG_FIELDS)
+    puzzle: Optional[Puzzle] = create_puzzle(puzzle_data)
+    if puzzle is None:
+        return None
+
+    return [puzzle.date, puzzle_data["dow"] or "", puzzle_data["author"] or "", puzzle.title]
@@ -0,0 +1,94 @@
+import json
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from config import DATA_PATH
+from puzzle_reader import Puzzle, create_puzzle, puzzle_files
+
+try:
+    import orjson
+
+except ImportError:
+    orjson = None
+
+# everything create_puzzle reads, the rest of a day file is never decoded
+PUZZLE_FIELDS: frozenset[str] = frozenset({"size", "grid", "gridnums", "clues", "answers", "title", "date"})
+# the catalog and the pack list puzzles by these too
+CATALOG_FIELDS: frozenset[str] = PUZZLE_FIELDS | {"dow", "author"}
+
+# the unused fields are a few percent of a day file, skipping them in python costs more than the c parsers spend on them
+_loads: Callable[[Union[bytes, str]], Any] = orjson.loads if orjson is not None else json.loads
+BACKEND: str = "orjson" if orjson is not None else "json"
+
+
+def decode_puzzle_data(data: Union[bytes, str], fields: frozenset[str] = PUZZLE_FIELDS) -> dict[str, Any]:
+    puzzle_data: Any = _loads(data)
+    if not isinstance(puzzle_data, dict):
+        raise ValueError("Puzzle json is not an object")
+
+    return {field: puzzle_data[field] for field in fields}
+
+
+def decode_puzzle(data: Union[bytes, str]) -> Optional[Puzzle]:
+    return create_puzzle(decode_puzzle_data(data))
+
+
+def load_puzzle(path: Path) -> Optional[Puzzle]:
+    with open(path.absolute(), "rb") as puzzle_file:
+        return decode_puzzle(puzzle_file.read())
+
+
+def _time_decoder(name: str, files: list[bytes], decode: Callable[[bytes], Any], rounds: int) -> float:
+    best: float = float("inf")
+    for _ in range(rounds):
+        start: float = time.perf_counter()
+        for data in files:
+            decode(data)
+
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{name:<28}{best * 1000:>10.1f}ms{best * 1e6 / len(files):>10.1f}us/file")
+    return best
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="compare puzzle decoding against json.load")
+    parser.add_argument("source", nargs="?", default=DATA_PATH)
+    parser.add_argument("--rounds", type=int, default=5, help="best of this many passes is reported")
+    args: Namespace = parser.parse_args()
+
+    files: list[bytes] = [day.read_bytes() for day in sorted(puzzle_files(Path(args.source)))]
+
+    # the fast paths must build exactly what the plain json route builds
+    mismatches: int = 0
+    for data in files:
+        try:
+            expected: Optional[Puzzle] = create_puzzle(json.loads(data))
+
+        except (ValueError, KeyError, TypeError, AssertionError):
+            continue
+
+        if expected is None:
+            continue
+
+        if decode_puzzle(data) != expected:
+            mismatches += 1
+
+    print(f"{len(files)} files, backend {BACKEND}, {mismatches} mismatches")
+    baseline: float = _time_decoder("json.loads", files, json.loads, args.rounds)
+    elapsed: float = _time_decoder("decode_puzzle_data", files, decode_puzzle_data, args.rounds)
+    print(f"{'':<28}{baseline / elapsed:>9.2f}x")
+    baseline = _time_decoder("json.loads + create_puzzle", files, lambda data: create_puzzle(json.loads(data)),
+                             args.rounds)
+    elapsed = _time_decoder("decode_puzzle", files, decode_puzzle, args.rounds)
+    print(f"{'':<28}{baseline / elapsed:>9.2f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import mmap
+import struct
+from argparse import ArgumentParser, Namespace
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Iterator,
+    NamedTuple,
+    Optional,
+)
+
+from config import DATA_PATH, PACK_PATH
+from puzzle_decoder import CATALOG_FIELDS, decode_puzzle_data
+from puzzle_reader import (
+    Answers,
+    Clues,
+    EMPTY_CELL,
+    Puzzle,
+    cell_clues_from_spans,
+    create_puzzle,
+    date_key,
+    puzzle_files,
+)
+
+PACK_MAGIC: bytes = b"XWPK"
+PACK_VERSION: int = 1
+
+# magic, version, puzzle count
+PACK_HEADER: struct.Struct = struct.Struct("<4sHI")
+# date key (yyyymmdd), record offset, record length
+INDEX_ENTRY: struct.Struct = struct.Struct("<IQI")
+# rows, cols, across count, down count, rebus count
+RECORD_HEADER: struct.Struct = struct.Struct("<HHHHH")
+STRING_COUNT: struct.Struct = struct.Struct("<I")
+
+# grid cells holding more than one ascii character are stored out of line, empty cells of a player grid
+# get a byte of their own so a fresh save does not store every open cell as a rebus
+REBUS_CELL: int = 0
+EMPTY_GRID_CELL: int = 1
+METADATA_STRINGS: int = 4
+
+
+class PackEntry(NamedTuple):
+    title: str
+    date: str
+    author: str
+    dow: str
+
+
+def encode_grid(grid: list[str]) -> tuple[bytes, array, list[str]]:
+    cells: bytearray = bytearray(len(grid))
+    rebus_indexes: array = array("H")
+    rebus_values: list[str] = []
+    for index, cell in enumerate(grid):
+        if len(cell) == 1 and cell.isascii():
+            cells[index] = ord(cell)
+            continue
+
+        if cell == EMPTY_CELL:
+            cells[index] = EMPTY_GRID_CELL
+            continue
+
+        cells[index] = REBUS_CELL
+        rebus_indexes.append(index)
+        rebus_values.append(cell)
+
+    return bytes(cells), rebus_indexes, rebus_values
+
+
+def decode_grid(cells: bytes, rebus_indexes: array, rebus_values: list[str]) -> list[str]:
+    grid: list[str] = list(cells.decode("ascii"))
+    index: int = cells.find(EMPTY_GRID_CELL)
+    while index >= 0:
+        grid[index] = EMPTY_CELL
+        index = cells.find(EMPTY_GRID_CELL, index + 1)
+
+    for index, value in zip(rebus_indexes, rebus_values):
+        grid[index] = value
+
+    return grid
+
+
+def _encode_strings(strings: list[str]) -> bytes:
+    encoded: list[bytes] = [string.encode("utf-8") for string in strings]
+    offsets: array = array("I", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    return STRING_COUNT.pack(len(encoded)) + offsets.tobytes() + b"".join(encoded)
+
+
+def _encode_record(puzzle: Puzzle, author: str, dow: str) -> bytes:
+    grid, rebus_indexes, rebus_values = encode_grid(puzzle.answers.completed)
+    across_ids: list[int] = list(puzzle.clues.across.keys())
+    down_ids: list[int] = list(puzzle.clues.down.keys())
+
+    strings: list[str] = [puzzle.title, puzzle.date, author, dow]
+    strings.extend(puzzle.clues.across[id_] for id_ in across_ids)
+    strings.extend(puzzle.answers.across[id_] for id_ in across_ids)
+    strings.extend(puzzle.clues.down[id_] for id_ in down_ids)
+    strings.extend(puzzle.answers.down[id_] for id_ in down_ids)
+    strings.extend(rebus_values)
+
+    return b"".join([
+        RECORD_HEADER.pack(puzzle.rows, puzzle.cols, len(across_ids), len(down_ids), len(rebus_indexes)),
+        grid,
+        array("H", puzzle.clues.grid).tobytes(),
+        puzzle.clues.by_index.across.tobytes(),
+        puzzle.clues.by_index.down.tobytes(),
+        array("H", across_ids).tobytes(),
+        array("H", down_ids).tobytes(),
+        rebus_indexes.tobytes(),
+        _encode_strings(strings),
+    ])
+
+
+class _RecordReader:
+
+    def __init__(self, buffer: memoryview) -> None:
+        self._buffer: memoryview = buffer
+        self._offset: int = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple[Any, ...]:
+        values: tuple[Any, ...] = layout.unpack_from(self._buffer, self._offset)
+        self._offset += layout.size
+        return values
+
+    def bytes(self, count: int) -> bytes:
+        data: bytes = bytes(self._buffer[self._offset:self._offset + count])
+        self._offset += count
+        return data
+
+    def array(self, typecode: str, count: int) -> array:
+        values: array = array(typecode)
+        values.frombytes(self.bytes(count * values.itemsize))
+        return values
+
+    def skip(self, typecode: str, count: int) -> None:
+        self._offset += count * array(typecode).itemsize
+
+    def strings(self, first: int, count: int) -> list[str]:
+        total, = self.unpack(STRING_COUNT)
+        # only the offsets of the wanted strings are read, listing a record needs just the first few
+        offsets: array = array("I")
+        offsets.frombytes(self._buffer[self._offset + first * offsets.itemsize:
+                                       self._offset + (first + count + 1) * offsets.itemsize])
+        base: int = self._offset + (total + 1) * offsets.itemsize
+        return [
+            str(self._buffer[base + offsets[index]:base + offsets[index + 1]], "utf-8")
+            for index in range(count)
+        ]
+
+
+class PuzzlePack:
+
+    def __init__(self, path: Path) -> None:
+        self._path: Path = path
+        self._file: BinaryIO = open(path.absolute(), "rb")
+        self._map: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = PACK_HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"Not a puzzle pack {path.absolute()}")
+
+        if version != PACK_VERSION:
+            raise ValueError(f"Unsupported puzzle pack version {version} in {path.absolute()}")
+
+        self._count: int = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> "PuzzlePack":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _index_entry(self, position: int) -> tuple[int, int, int]:
+        if not 0 <= position < self._count:
+            raise IndexError(f"puzzle pack position out of range {position}")
+
+        return INDEX_ENTRY.unpack_from(self._map, PACK_HEADER.size + position * INDEX_ENTRY.size)
+
+    def _record(self, position: int) -> _RecordReader:
+        _, offset, length = self._index_entry(position)
+        return _RecordReader(memoryview(self._map)[offset:offset + length])
+
+    def date_key(self, position: int) -> int:
+        return self._index_entry(position)[0]
+
+    def find(self, date: str) -> Optional[int]:
+        key: int = date_key(date)
+        position: int = bisect_left(range(self._count), key, key=self.date_key)
+        if position < self._count and self.date_key(position) == key:
+            return position
+
+        return None
+
+    def entry(self, position: int) -> PackEntry:
+        record: _RecordReader = self._record(position)
+        rows, cols, across_count, down_count, rebus_count = record.unpack(RECORD_HEADER)
+        size: int = rows * cols
+        record.skip("B", size)
+        record.skip("H", size * 3 + across_count + down_count + rebus_count)
+        return PackEntry(*record.strings(0, METADATA_STRINGS))
+
+    def load(self, position: int) -> Puzzle:
+        record: _RecordReader = self._record(position)
+        rows, cols, across_count, down_count, rebus_count = record.unpack(RECORD_HEADER)
+        size: int = rows * cols
+
+        cells: bytes = record.bytes(size)
+        gridnums: array = record.array("H", size)
+        across_span: array = record.array("H", size)
+        down_span: array = record.array("H", size)
+        across_ids: array = record.array("H", across_count)
+        down_ids: array = record.array("H", down_count)
+        rebus_indexes: array = record.array("H", rebus_count)
+
+        strings: list[str] = record.strings(0, METADATA_STRINGS + (across_count + down_count) * 2 + rebus_count)
+        title, date = strings[0], strings[1]
+        cursor: int = METADATA_STRINGS
+
+        def take(count: int) -> list[str]:
+            nonlocal cursor
+            taken: list[str] = strings[cursor:cursor + count]
+            cursor += count
+            return taken
+
+        clues_across: dict[int, str] = dict(zip(across_ids, take(across_count)))
+        answers_across: dict[int, str] = dict(zip(across_ids, take(across_count)))
+        clues_down: dict[int, str] = dict(zip(down_ids, take(down_count)))
+        answers_down: dict[int, str] = dict(zip(down_ids, take(down_count)))
+        grid: list[str] = decode_grid(cells, rebus_indexes, take(rebus_count))
+
+        return Puzzle(
+            title,
+            date,
+            rows,
+            cols,
+            Answers(answers_across, answers_down, grid),
+            Clues(clues_across, clues_down, cell_clues_from_spans(across_span, down_span, cols), gridnums.tolist())
+        )
+
+
+def build_pack(source: Path, destination: Path) -> int:
+    records: list[tuple[int, bytes]] = []
+    for day in puzzle_files(source):
+        puzzle_data: dict[str, Any] = decode_puzzle_data(day.read_bytes(), CATALOG_FIELDS)
+        puzzle: Optional[Puzzle] = create_puzzle(puzzle_data)
+        if puzzle is None:
+            continue
+
+        records.append((
+            date_key(puzzle.date),
+            _encode_record(puzzle, puzzle_data["author"] or "", puzzle_data["dow"] or "")
+        ))
+
+    records.sort(key=lambda record: record[0])
+    offset: int = PACK_HEADER.size + INDEX_ENTRY.size * len(records)
+
+    with open(destination.absolute(), "wb") as pack_file:
+        pack_file.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(records)))
+        for key, data in records:
+            pack_file.write(INDEX_ENTRY.pack(key, offset, len(data)))
+            offset += len(data)
+
+        for _, data in records:
+            pack_file.write(data)
+
+    return len(records)
+
+
+def packed_puzzles(path: Path) -> Iterator[Puzzle]:
+    with PuzzlePack(path) as pack:
+        for position in range(len(pack)):
+            yield pack.load(position)
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="compile a puzzle directory into a puzzle pack")
+    parser.add_argument("source", nargs="?", default=DATA_PATH)
+    parser.add_argument("destination", nargs="?", default=PACK_PATH)
+    args: Namespace = parser.parse_args()
+
+    count: int = build_pack(Path(args.source), Path(args.destination))
+    print(f"packed {count} puzzles into {Path(args.destination).absolute()}")
+
+
+if __name__ == "__main__":
+    main()
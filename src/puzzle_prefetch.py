@@ -0,0 +1,64 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from config import PREFETCH_DEPTH
+from cross_words import CrossWords
+from metrics import METRICS
+from puzzle_catalog import PuzzleCatalog
+
+
+class PuzzlePrefetcher:
+
+    def __init__(self, catalog: PuzzleCatalog, depth: int = PREFETCH_DEPTH) -> None:
+        self._catalog: PuzzleCatalog = catalog
+        self._depth: int = depth
+        self._position: int = -1
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._pending: dict[int, Future[CrossWords]] = {}
+
+    def _build(self, index: int) -> CrossWords:
+        with METRICS.timer("puzzle_load"):
+            return CrossWords(self._catalog.load(index))
+
+    def _window(self) -> list[int]:
+        # nearest first, so the worker builds what is most likely to be needed next
+        offsets: list[int] = [1, -1] + list(range(2, self._depth + 1))
+        return [(self._position + offset) % len(self._catalog) for offset in offsets]
+
+    def _schedule(self) -> None:
+        window: list[int] = self._window()
+        for index in list(self._pending.keys()):
+            if index not in window:
+                self._pending.pop(index).cancel()
+
+        for index in window:
+            if index not in self._pending:
+                self._pending[index] = self._executor.submit(self._build, index)
+
+    def seek(self, index: int) -> CrossWords:
+        if not len(self._catalog):
+            raise ValueError("Puzzle catalog is empty")
+
+        index %= len(self._catalog)
+        future: Optional[Future[CrossWords]] = self._pending.pop(index, None)
+        if future is None:
+            for pending in self._pending.values():
+                pending.cancel()
+
+            self._pending.clear()
+            future = self._executor.submit(self._build, index)
+
+        cross_words: CrossWords = future.result()
+
+        self._position = index
+        self._schedule()
+        return cross_words
+
+    def next(self) -> CrossWords:
+        return self.seek(self._position + 1)
+
+    def previous(self) -> CrossWords:
+        return self.seek(self._position - 1 if self._position >= 0 else -1)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
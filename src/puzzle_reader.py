@@ -1,17 +1,18 @@
 import json
+from array import array
 from dataclasses import dataclass
 from pathlib import Path
 from typing import (
     Any,
+    Iterable,
     Iterator,
     NamedTuple,
     Optional,
 )
 
-from config import DATA_PATH
-
 VOID_CELL: str = "."
 EMPTY_CELL: str = ""
+OPEN_CELL: str = "#"
 
 
 @dataclass(slots=True)
@@ -20,10 +21,24 @@ class CellClue:
     down: Optional[int] = None
 
 
+@dataclass(slots=True)
+class CellClues:
+    across: array
+    down: array
+    across_cells: dict[int, range]
+    down_cells: dict[int, range]
+
+    def __getitem__(self, index: int) -> CellClue:
+        return CellClue(self.across[index] or None, self.down[index] or None)
+
+    def __len__(self) -> int:
+        return len(self.across)
+
+
 class Clues(NamedTuple):
     across: dict[int, str]
     down: dict[int, str]
-    by_index: dict[int, CellClue]
+    by_index: CellClues
     grid: list[int]
 
 
@@ -47,6 +62,73 @@ class Puzzle(NamedTuple):
     clues: Clues
 
 
+def date_key(date: str) -> int:
+    month, day, year = date.split("/")
+    return int(year) * 10000 + int(month) * 100 + int(day)
+
+
+def key_date(key: int) -> str:
+    return f"{key // 100 % 100}/{key % 100}/{key // 10000}"
+
+
+def create_spans(mask: str, gridnums: list[int], rows: int, cols: int,
+                 across_ids: Iterable[int], down_ids: Iterable[int]) -> Optional[CellClues]:
+    size: int = rows * cols
+    across: array = array("H", bytes(size * 2))
+    down: array = array("H", bytes(size * 2))
+    columns: list[str] = [mask[col::cols] for col in range(cols)]
+    positions: dict[int, int] = {clue_id: index for index, clue_id in enumerate(gridnums) if clue_id}
+
+    # a word runs until the next void cell, or until the next word starting inside the same run
+    across_cells: dict[int, range] = {}
+    across_starts: list[int] = sorted(positions[clue_id] for clue_id in across_ids if clue_id in positions)
+    across_covered: int = 0
+    for start, next_start in zip(across_starts, across_starts[1:] + [size]):
+        row_end: int = (start // cols + 1) * cols
+        end: int = mask.find(VOID_CELL, start, row_end)
+        end = min(row_end if end == -1 else end, next_start)
+        across[start:end] = array("H", [gridnums[start]]) * (end - start)
+        across_cells[gridnums[start]] = range(start, end)
+        across_covered += end - start
+
+    down_starts: dict[int, list[int]] = {}
+    for clue_id in down_ids:
+        if clue_id in positions:
+            down_starts.setdefault(positions[clue_id] % cols, []).append(positions[clue_id] // cols)
+
+    down_cells: dict[int, range] = {}
+    down_covered: int = 0
+    for col, starts in down_starts.items():
+        starts.sort()
+        for start, next_start in zip(starts, starts[1:] + [rows]):
+            end: int = columns[col].find(VOID_CELL, start)
+            end = min(rows if end == -1 else end, next_start)
+            down[start * cols + col:end * cols:cols] = array("H", [gridnums[start * cols + col]]) * (end - start)
+            down_cells[gridnums[start * cols + col]] = range(start * cols + col, end * cols, cols)
+            down_covered += end - start
+
+    # words never overlap, so every open cell is covered exactly when the counts match
+    open_cells: int = mask.count(OPEN_CELL)
+    if across_covered != open_cells or down_covered != open_cells:
+        return None
+
+    return CellClues(across, down, across_cells, down_cells)
+
+
+def cell_clues_from_spans(across: array, down: array, cols: int) -> CellClues:
+    across_cells: dict[int, range] = {}
+    for clue_id in sorted(set(across) - {0}):
+        start: int = across.index(clue_id)
+        across_cells[clue_id] = range(start, start + across.count(clue_id))
+
+    down_cells: dict[int, range] = {}
+    for clue_id in sorted(set(down) - {0}):
+        start: int = down.index(clue_id)
+        down_cells[clue_id] = range(start, start + down.count(clue_id) * cols, cols)
+
+    return CellClues(across, down, across_cells, down_cells)
+
+
 def create_puzzle(puzzle_data: dict[str, Any]) -> Optional[Puzzle]:
     rows: int = int(puzzle_data["size"]["rows"])
     cols: int = int(puzzle_data["size"]["cols"])
@@ -67,41 +149,20 @@ def create_puzzle(puzzle_data: dict[str, Any]) -> Optional[Puzzle]:
         clues_down[int(id_)] = clue_down
         answers_down[int(id_)] = answer_down
 
-    state: list[str] = [cell if cell == VOID_CELL else EMPTY_CELL for cell in puzzle_data["grid"]]
-    by_index: dict[int, CellClue] = {_: CellClue() for _ in range(cols * rows)}
-    for index, val in enumerate(puzzle_data["gridnums"]):
-        if val == 0:
-            continue
-
-        if val in clues_across:
-            next_index: int = index
-            while not state[next_index]:
-
-                by_index[next_index].across = val
-                next_index += 1
-
-                if next_index >= cols * rows:
-                    break
-
-        if val in clues_down:
-            next_index: int = index
-            while not state[next_index]:
-
-                by_index[next_index].down = val
-                next_index += cols
-
-                if next_index >= cols * rows:
-                    break
-
-    for index, cell in enumerate(state):
-        if cell == VOID_CELL:
-            continue
-
-        if by_index[index].across is None or by_index[index].down is None:
-            # FIXME: this will usually mean some edge case I will not add support for ;)
-            #        e.g when there are words in NULL_CELLS https://www.xwordinfo.com/Crossword?date=12/1/2013&g=48&d=A
-            #        puzzle: 2013-12-1
-            return None
+    mask: str = "".join(VOID_CELL if cell == VOID_CELL else OPEN_CELL for cell in puzzle_data["grid"])
+    by_index: Optional[CellClues] = create_spans(
+        mask,
+        puzzle_data["gridnums"],
+        rows,
+        cols,
+        clues_across.keys(),
+        clues_down.keys()
+    )
+    if by_index is None:
+        # FIXME: this will usually mean some edge case I will not add support for ;)
+        #        e.g when there are words in NULL_CELLS https://www.xwordinfo.com/Crossword?date=12/1/2013&g=48&d=A
+        #        puzzle: 2013-12-1
+        return None
 
     answers: Answers = Answers(
         answers_across,
@@ -126,8 +187,7 @@ def create_puzzle(puzzle_data: dict[str, Any]) -> Optional[Puzzle]:
     )
 
 
-def puzzles() -> Iterator[Puzzle]:
-    path: Path = Path(DATA_PATH)
+def puzzle_files(path: Path) -> Iterator[Path]:
     if not path.exists():
         raise ValueError(f"Data Path does not exist {path.absolute()}")
 
@@ -139,14 +199,7 @@ def puzzles() -> Iterator[Puzzle]:
             if day.is_dir():
                 continue
 
-            with open(day.absolute(), "r") as puzzle_file:
-                puzzle_data: dict[str, Any] = json.load(puzzle_file)
-
-            puzzle: Optional[Puzzle] = create_puzzle(puzzle_data)
-            if puzzle is None:
-                continue
-
-            yield puzzle
+            yield day
 
 
 def get_that_one() -> Puzzle:
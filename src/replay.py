@@ -0,0 +1,229 @@
+import os
+import random
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Optional
+
+# replays never open a window, this has to happen before pygame starts
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from pygame.event import Event
+from pygame.surface import Surface
+
+from benchmark_frames import summarize
+from config import DATA_PATH, JOURNAL_PATH, WINDOW_HEIGHT, WINDOW_WIDTH
+from cross_words import CrossWords
+from journal import (
+    CLICK_RECORD,
+    Journal,
+    KEY_RECORD,
+    PUZZLE_RECORD,
+    RESIZE_RECORD,
+    SNAPSHOT_RECORD,
+    JournalEntry,
+    decode_event,
+    puzzle_date,
+    read_journal,
+    write_journal,
+)
+from puzzle_catalog import PuzzleCatalog
+from puzzle_reader import VOID_CELL, Puzzle, date_key
+from save_state import Snapshot, decode_snapshot
+
+
+def synthesize(puzzle: Puzzle, count: int, seed: int) -> list[JournalEntry]:
+    # typing runs with the occasional backspace, check and click, one millisecond apart
+    cross_words: CrossWords = CrossWords(puzzle, Surface((WINDOW_WIDTH, WINDOW_HEIGHT)))
+    cells: list[tuple[int, int]] = [
+        cross_words.cell_center(index) for index, value in enumerate(puzzle.answers.completed) if value != VOID_CELL
+    ]
+
+    generator: random.Random = random.Random(seed)
+    entries: list[JournalEntry] = [JournalEntry(0, PUZZLE_RECORD, date_key(puzzle.date), WINDOW_WIDTH, WINDOW_HEIGHT)]
+    for time_ms in range(count):
+        roll: float = generator.random()
+        if roll < 0.1:
+            x, y = generator.choice(cells)
+            entries.append(JournalEntry(time_ms, CLICK_RECORD, x, y, 1))
+
+        elif roll < 0.18:
+            entries.append(JournalEntry(time_ms, KEY_RECORD, pygame.K_BACKSPACE, ord("\b"), 0))
+
+        elif roll < 0.2:
+            entries.append(JournalEntry(time_ms, KEY_RECORD, pygame.K_SPACE, ord(" "), 0))
+
+        else:
+            letter: str = generator.choice("abcdefghijklmnopqrstuvwxyz")
+            entries.append(JournalEntry(time_ms, KEY_RECORD, ord(letter), ord(letter), 0))
+
+    return entries
+
+
+def _sized(screen: Surface, width: int, height: int) -> Surface:
+    # journals from before the window could resize carry no size, they replay on the screen given
+    if not width or not height or screen.get_size() == (width, height):
+        return screen
+
+    return Surface((width, height))
+
+
+def replay(entries: list[JournalEntry], catalog: PuzzleCatalog, screen: Surface, speed: float,
+           finished: Optional[dict[str, Snapshot]] = None) -> tuple[list[float], list[float]]:
+    # a puzzle starts from the snapshot journaled when it was shown, or from an empty grid in journals without one
+    cross_words: Optional[CrossWords] = None
+    process: list[float] = []
+    render: list[float] = []
+    finished = {} if finished is None else finished
+    start: float = time.perf_counter()
+    for entry in entries:
+        if speed > 0:
+            delay: float = entry.time_ms / 1000 / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+        if entry.kind == PUZZLE_RECORD:
+            index: Optional[int] = catalog.find(puzzle_date(entry))
+            if index is None:
+                raise ValueError(f"Journal puzzle {puzzle_date(entry)} is not in the catalog")
+
+            if cross_words is not None:
+                finished[cross_words.date] = cross_words.snapshot()
+
+            cross_words = CrossWords(catalog.load(index), _sized(screen, entry.b, entry.c))
+            cross_words.render()
+            continue
+
+        if cross_words is None:
+            raise ValueError("Journal input arrives before any puzzle")
+
+        if entry.kind == RESIZE_RECORD:
+            cross_words.resize(_sized(screen, entry.a, entry.b))
+            cross_words.render()
+            continue
+
+        if entry.kind == SNAPSHOT_RECORD:
+            cross_words.restore(decode_snapshot(cross_words.date, entry.data))
+            cross_words.invalidate()
+            cross_words.render()
+            continue
+
+        event: Event = decode_event(entry)
+        tick: float = time.perf_counter()
+        cross_words.process_input(event)
+        cross_words.update(0)
+        process.append((time.perf_counter() - tick) * 1000)
+
+        tick = time.perf_counter()
+        cross_words.render()
+        render.append((time.perf_counter() - tick) * 1000)
+
+    if cross_words is not None:
+        finished[cross_words.date] = cross_words.snapshot()
+
+    return process, render
+
+
+def check(catalog: PuzzleCatalog, count: int, seed: int) -> int:
+    # records a session the way the app runs one, resuming saved progress on the first puzzle, moving to a second
+    # and coming back to the first, then replays the journal and compares the grids it ends with
+    first: Puzzle = catalog.load(0)
+    second: Puzzle = catalog.load(1 % len(catalog))
+    screen: Surface = Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    recorded: dict[str, Snapshot] = {}
+
+    def play(cross_words: CrossWords, journal: Journal, inputs: list[JournalEntry]) -> None:
+        journal.show(cross_words.date, cross_words.size, cross_words.snapshot)
+        for entry in inputs:
+            event: Event = decode_event(entry)
+            journal.record(cross_words.date, cross_words.size, event)
+            cross_words.process_input(event)
+            cross_words.update(0)
+            cross_words.render()
+
+        recorded[cross_words.date] = cross_words.snapshot()
+
+    def session(puzzle: Puzzle, offset: int) -> list[JournalEntry]:
+        return [entry for entry in synthesize(puzzle, count, seed + offset) if entry.kind != PUZZLE_RECORD]
+
+    # the saved progress is typed into a puzzle that is not journaled, like an earlier run of the app
+    saved: CrossWords = CrossWords(first, screen)
+    for entry in session(first, 0):
+        saved.process_input(decode_event(entry))
+
+    with TemporaryDirectory() as directory:
+        path: Path = Path(directory) / "check.journal"
+        journal: Journal = Journal(path, True)
+
+        resumed: CrossWords = CrossWords(first, screen)
+        resumed.restore(saved.snapshot())
+        play(resumed, journal, session(first, 1))
+        play(CrossWords(second, screen), journal, session(second, 2))
+        returned: CrossWords = CrossWords(first, screen)
+        returned.restore(recorded[first.date])
+        play(returned, journal, session(first, 3))
+        journal.close()
+
+        entries: list[JournalEntry] = list(read_journal(path))
+
+    replayed: dict[str, Snapshot] = {}
+    replay(entries, catalog, Surface((WINDOW_WIDTH, WINDOW_HEIGHT)), 0, replayed)
+    for date, snapshot in recorded.items():
+        if replayed.get(date) != snapshot:
+            raise ValueError(f"Replayed grid for {date} differs from the recorded session")
+
+    return len(entries)
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="replay a recorded input journal headless, or synthesize one")
+    parser.add_argument("--source", default=DATA_PATH)
+    parser.add_argument("command", choices=["replay", "synthesize", "check"])
+    parser.add_argument("journal", nargs="?", default=JOURNAL_PATH)
+    parser.add_argument("--speed", type=float, default=0,
+                        help="replay: 1 keeps the recorded timing, 10 is ten times faster, 0 does not wait at all")
+    parser.add_argument("--repeat", type=int, default=1, help="replay: run the journal this many times")
+    parser.add_argument("--date", help="synthesize: the puzzle to type into, the first one by default")
+    parser.add_argument("--count", type=int, default=10_000,
+                        help="synthesize: number of input events, check: input events per puzzle visit")
+    parser.add_argument("--seed", type=int, default=0)
+    args: Namespace = parser.parse_args()
+
+    pygame.init()
+    catalog: PuzzleCatalog = PuzzleCatalog.from_directory(Path(args.source))
+    if args.command == "synthesize":
+        index: Optional[int] = 0 if args.date is None else catalog.find(args.date)
+        if index is None:
+            raise ValueError(f"Puzzle {args.date} is not in the catalog")
+
+        entries: list[JournalEntry] = synthesize(catalog.load(index), args.count, args.seed)
+        write_journal(Path(args.journal), entries)
+        print(f"wrote {len(entries)} records to {args.journal}", file=sys.stderr)
+        return
+
+    if args.command == "check":
+        records: int = check(catalog, args.count, args.seed)
+        print(f"replayed a {records} record session with a resume and a revisit, grids match", file=sys.stderr)
+        return
+
+    entries = list(read_journal(Path(args.journal)))
+    screen: Surface = Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    process: list[float] = []
+    render: list[float] = []
+    start: float = time.perf_counter()
+    for _ in range(args.repeat):
+        run_process, run_render = replay(entries, catalog, screen, args.speed)
+        process.extend(run_process)
+        render.extend(run_render)
+
+    elapsed: float = time.perf_counter() - start
+    print(f"{len(process)} events in {elapsed:.2f}s, {len(process) / elapsed:.0f} events/s")
+    print(f"process_input ms {summarize(process)}")
+    print(f"render ms        {summarize(render)}")
+
+
+if __name__ == "__main__":
+    main()
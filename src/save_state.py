@@ -0,0 +1,240 @@
+import os
+import struct
+import zlib
+from array import array
+from pathlib import Path
+from threading import Condition, Thread
+from time import monotonic
+from typing import BinaryIO, NamedTuple, Optional
+
+from config import SAVE_COMPACT_RATIO, SAVE_DEBOUNCE_S, SAVE_MAX_DELAY_S, SAVE_PATH
+from puzzle_pack import decode_grid, encode_grid
+from puzzle_reader import date_key
+
+SAVE_MAGIC: bytes = b"XWSV"
+SAVE_VERSION: int = 1
+
+# magic, version
+FILE_HEADER: struct.Struct = struct.Struct("<4sH")
+# date key (yyyymmdd), payload length, crc32 of the payload
+RECORD_HEADER: struct.Struct = struct.Struct("<III")
+# cell count, rebus count, selected cell, selected across, selected down, across scroll, down scroll
+SNAPSHOT_HEADER: struct.Struct = struct.Struct("<HHiiiii")
+NO_SELECTION: int = -1
+
+
+class Snapshot(NamedTuple):
+    date: str
+    values: list[str]
+    # bitsets over cell indexes
+    locked_in: int
+    wrong: int
+    selected: Optional[int]
+    selected_across: Optional[int]
+    selected_down: Optional[int]
+    across_scroll: int
+    down_scroll: int
+
+
+def _optional(value: int) -> Optional[int]:
+    return None if value == NO_SELECTION else value
+
+
+def encode_snapshot(snapshot: Snapshot) -> bytes:
+    cells, rebus_indexes, rebus_values = encode_grid(snapshot.values)
+    bitset_size: int = (len(cells) + 7) // 8
+    rebus: bytes = "\x00".join(rebus_values).encode("utf-8")
+    return b"".join([
+        SNAPSHOT_HEADER.pack(
+            len(cells),
+            len(rebus_indexes),
+            NO_SELECTION if snapshot.selected is None else snapshot.selected,
+            NO_SELECTION if snapshot.selected_across is None else snapshot.selected_across,
+            NO_SELECTION if snapshot.selected_down is None else snapshot.selected_down,
+            snapshot.across_scroll,
+            snapshot.down_scroll,
+        ),
+        cells,
+        snapshot.locked_in.to_bytes(bitset_size, "little"),
+        snapshot.wrong.to_bytes(bitset_size, "little"),
+        rebus_indexes.tobytes(),
+        rebus,
+    ])
+
+
+def decode_snapshot(date: str, payload: bytes) -> Snapshot:
+    count, rebus_count, selected, across, down, across_scroll, down_scroll = \
+        SNAPSHOT_HEADER.unpack_from(payload)
+    offset: int = SNAPSHOT_HEADER.size
+    bitset_size: int = (count + 7) // 8
+
+    cells: bytes = payload[offset:offset + count]
+    offset += count
+    locked_in: int = int.from_bytes(payload[offset:offset + bitset_size], "little")
+    offset += bitset_size
+    wrong: int = int.from_bytes(payload[offset:offset + bitset_size], "little")
+    offset += bitset_size
+    rebus_indexes: array = array("H", payload[offset:offset + rebus_count * 2])
+    offset += rebus_count * 2
+    rebus_values: list[str] = payload[offset:].decode("utf-8").split("\x00") if rebus_count else []
+
+    return Snapshot(date, decode_grid(cells, rebus_indexes, rebus_values), locked_in, wrong, _optional(selected),
+                    _optional(across), _optional(down), across_scroll, down_scroll)
+
+
+class SaveStore:
+
+    def __init__(self, path: Path, debounce: float = SAVE_DEBOUNCE_S, max_delay: float = SAVE_MAX_DELAY_S) -> None:
+        self._path: Path = path
+        self._debounce: float = debounce
+        self._max_delay: float = max_delay
+        self._condition: Condition = Condition()
+        # newest payload per date key, what load answers from, so it never touches the disk
+        self._latest: dict[int, bytes] = {}
+        self._pending: dict[int, bytes] = {}
+        self._last_change: float = 0.0
+        self._first_change: float = 0.0
+        self._file_size: int = 0
+        self._closed: bool = False
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._scan()
+        self._thread = Thread(target=self._run, name="saves", daemon=True)
+        self._thread.start()
+
+    def _scan(self) -> None:
+        self._file_size = 0
+        if not self._path.exists():
+            return
+
+        with open(self._path.absolute(), "rb") as save_file:
+            data: bytes = save_file.read()
+
+        magic, version = FILE_HEADER.unpack_from(data) if len(data) >= FILE_HEADER.size else (b"", 0)
+        if magic != SAVE_MAGIC or version != SAVE_VERSION:
+            # an unknown file is never appended to, the next write replaces it
+            return
+
+        offset: int = FILE_HEADER.size
+        while offset + RECORD_HEADER.size <= len(data):
+            key, length, checksum = RECORD_HEADER.unpack_from(data, offset)
+            start: int = offset + RECORD_HEADER.size
+            payload: bytes = data[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != checksum:
+                # a write torn by a crash, everything before it is intact and later appends overwrite it
+                break
+
+            self._latest[key] = payload
+            offset = start + length
+
+        self._file_size = offset
+
+    def save(self, snapshot: Snapshot) -> None:
+        key: int = date_key(snapshot.date)
+        payload: bytes = encode_snapshot(snapshot)
+        with self._condition:
+            if self._latest.get(key) == payload:
+                return
+
+            self._latest[key] = payload
+            self._last_change = monotonic()
+            if not self._pending:
+                self._first_change = self._last_change
+
+            self._pending[key] = payload
+            self._condition.notify()
+
+    def load(self, date: str) -> Optional[Snapshot]:
+        with self._condition:
+            payload: Optional[bytes] = self._latest.get(date_key(date))
+
+        return None if payload is None else decode_snapshot(date, payload)
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+
+                # keystrokes in quick succession collapse into one write of the newest state, but steady typing
+                # never pauses for a whole debounce, so the oldest pending change caps how long the write waits
+                while not self._closed and (remaining := min(self._last_change + self._debounce,
+                                                             self._first_change + self._max_delay) - monotonic()) > 0:
+                    self._condition.wait(remaining)
+
+                pending: dict[int, bytes] = self._pending
+                self._pending = {}
+                closed: bool = self._closed
+
+            if pending:
+                self._write(pending)
+
+            if closed:
+                return
+
+    def _write(self, pending: dict[int, bytes]) -> None:
+        with self._condition:
+            live: int = sum(RECORD_HEADER.size + len(payload) for payload in self._latest.values())
+
+        try:
+            if self._file_size == 0 or self._file_size > live * SAVE_COMPACT_RATIO:
+                self._compact()
+
+            else:
+                self._append(pending)
+
+        except OSError:
+            # progress stays in memory, the next save rewrites the whole file from it
+            self._file_size = 0
+
+    @staticmethod
+    def _records(records: dict[int, bytes]) -> bytes:
+        return b"".join(RECORD_HEADER.pack(key, len(payload), zlib.crc32(payload)) + payload
+                        for key, payload in records.items())
+
+    def _append(self, pending: dict[int, bytes]) -> None:
+        data: bytes = self._records(pending)
+        with open(self._path.absolute(), "r+b") as save_file:
+            # appending after the last valid record drops a torn tail left by a crash
+            save_file.seek(self._file_size)
+            save_file.write(data)
+            save_file.truncate()
+            self._sync(save_file)
+
+        self._file_size += len(data)
+
+    def _compact(self) -> None:
+        with self._condition:
+            latest: dict[int, bytes] = dict(self._latest)
+
+        data: bytes = FILE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION) + self._records(latest)
+        temporary: Path = self._path.with_name(self._path.name + ".tmp")
+        with open(temporary.absolute(), "wb") as save_file:
+            save_file.write(data)
+            self._sync(save_file)
+
+        os.replace(temporary, self._path)
+        self._file_size = len(data)
+
+    @staticmethod
+    def _sync(save_file: BinaryIO) -> None:
+        save_file.flush()
+        os.fsync(save_file.fileno())
+
+
+SAVES: SaveStore = SaveStore(Path(SAVE_PATH))
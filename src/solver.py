@@ -0,0 +1,291 @@
+import json
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+from config import DATA_PATH
+from corpus_sources import source_puzzles
+from puzzle_pack import packed_puzzles
+from puzzle_reader import EMPTY_CELL, Puzzle, VOID_CELL
+from word_index import Entry, WordIndex, corpus_entries, puzzle_entries
+
+MAX_NODES: int = 10_000
+FIRST_RESTART: int = 32
+
+
+class Slot(NamedTuple):
+    direction: str
+    id: int
+    cells: range
+
+
+class Crossing(NamedTuple):
+    slot: int
+    # (words of this slot with a letter at the shared cell, words of the crossing slot with the same letter there)
+    supports: list[tuple[int, int]]
+
+
+class SolveResult(NamedTuple):
+    date: str
+    solved: bool
+    gave_up: bool
+    correct: int
+    cells: int
+    nodes: int
+    elapsed: float
+    grid: Optional[list[str]]
+
+
+def puzzle_slots(puzzle: Puzzle) -> list[Slot]:
+    return [Slot("across", id_, cells) for id_, cells in puzzle.clues.by_index.across_cells.items()] + \
+        [Slot("down", id_, cells) for id_, cells in puzzle.clues.by_index.down_cells.items()]
+
+
+class Solver:
+
+    def __init__(self, puzzle: Puzzle, index: WordIndex, givens: Optional[Sequence[str]] = None,
+                 exclude: Iterable[Entry] = (), max_nodes: int = MAX_NODES) -> None:
+        self._puzzle: Puzzle = puzzle
+        self._index: WordIndex = index
+        self._max_nodes: int = max_nodes
+        self._nodes: int = 0
+        self._node_limit: int = max_nodes
+        self._slots: list[Slot] = puzzle_slots(puzzle)
+        self._crossings: list[list[Crossing]] = [[] for _ in self._slots]
+        # slots of the same length can not share a word, so an assignment is removed from its peers
+        self._peers: list[list[int]] = [[] for _ in self._slots]
+        # how often each slot took part in a dead end, steering the search towards the hard part of the grid
+        self._weights: list[int] = [1] * len(self._slots)
+
+        excluded: dict[int, int] = {}
+        for entry in exclude:
+            excluded[len(entry)] = excluded.get(len(entry), 0) | index.bit(entry)
+
+        owners: dict[int, list[tuple[int, int]]] = {}
+        self._domains: list[int] = []
+        for slot_index, slot in enumerate(self._slots):
+            pattern: list[str] = [EMPTY_CELL] * len(slot.cells)
+            for position, cell in enumerate(slot.cells):
+                owners.setdefault(cell, []).append((slot_index, position))
+                if givens is not None and givens[cell] != VOID_CELL:
+                    pattern[position] = givens[cell]
+
+            self._domains.append(index.match(pattern) & ~excluded.get(len(slot.cells), 0))
+
+        for shared in owners.values():
+            for slot_index, position in shared:
+                letters: dict[str, int] = index.letters(len(self._slots[slot_index].cells), position)
+                for other, other_position in shared:
+                    if other == slot_index:
+                        continue
+
+                    other_letters: dict[str, int] = index.letters(len(self._slots[other].cells), other_position)
+                    self._crossings[slot_index].append(Crossing(other, [
+                        (bits, other_letters[letter]) for letter, bits in letters.items() if letter in other_letters
+                    ]))
+
+        for slot_index, slot in enumerate(self._slots):
+            self._peers[slot_index] = [other for other, other_slot in enumerate(self._slots)
+                                       if other != slot_index and len(other_slot.cells) == len(slot.cells)]
+
+    @property
+    def nodes(self) -> int:
+        return self._nodes
+
+    @property
+    def gave_up(self) -> bool:
+        return self._nodes >= self._max_nodes
+
+    def _out_of_nodes(self) -> bool:
+        return self._nodes >= self._node_limit
+
+    def slots(self) -> list[Slot]:
+        return self._slots
+
+    @staticmethod
+    def _revise(domains: list[int], slot: int, crossing: Crossing) -> bool:
+        # keep the words of the crossing slot whose letter at the shared cell is still possible in this slot
+        domain: int = domains[slot]
+        support: int = 0
+        for bits, other_bits in crossing.supports:
+            if domain & bits:
+                support |= other_bits
+
+        revised: int = domains[crossing.slot] & support
+        if revised == domains[crossing.slot]:
+            return False
+
+        domains[crossing.slot] = revised
+        return True
+
+    def _propagate(self, domains: list[int], queue: list[int]) -> bool:
+        pending: set[int] = set(queue)
+        while queue:
+            slot: int = queue.pop()
+            pending.discard(slot)
+            if not domains[slot]:
+                return False
+
+            changed: list[int] = [crossing.slot for crossing in self._crossings[slot]
+                                  if self._revise(domains, slot, crossing)]
+
+            if domains[slot].bit_count() == 1:
+                for peer in self._peers[slot]:
+                    if domains[peer] & domains[slot]:
+                        domains[peer] &= ~domains[slot]
+                        changed.append(peer)
+
+            for other in changed:
+                if not domains[other]:
+                    self._weights[slot] += 1
+                    self._weights[other] += 1
+                    return False
+
+                if other not in pending:
+                    pending.add(other)
+                    queue.append(other)
+
+        return True
+
+    def _assign(self, domains: list[int], slot: int) -> bool:
+        # forward checking only, full arc consistency at every node costs far more than the extra nodes it saves
+        queue: list[int] = [slot]
+        while queue:
+            assigned: int = queue.pop()
+            changed: list[int] = [crossing.slot for crossing in self._crossings[assigned]
+                                  if self._revise(domains, assigned, crossing)]
+
+            for peer in self._peers[assigned]:
+                if domains[peer] & domains[assigned]:
+                    domains[peer] &= ~domains[assigned]
+                    changed.append(peer)
+
+            for other in changed:
+                if not domains[other]:
+                    self._weights[assigned] += 1
+                    self._weights[other] += 1
+                    return False
+
+                if domains[other].bit_count() == 1:
+                    queue.append(other)
+
+        return True
+
+    def _search(self, domains: list[int]) -> Optional[list[int]]:
+        self._nodes += 1
+        if self._out_of_nodes():
+            return None
+
+        # most constrained slot first, fewest candidate words left relative to how often it caused a dead end
+        open_slots: list[int] = [slot for slot, bits in enumerate(domains) if bits.bit_count() > 1]
+        if not open_slots:
+            return domains
+
+        slot: int = min(open_slots, key=lambda candidate: domains[candidate].bit_count() / self._weights[candidate])
+        candidates: int = domains[slot]
+        while candidates:
+            word: int = candidates & -candidates
+            candidates ^= word
+
+            trial: list[int] = domains.copy()
+            trial[slot] = word
+            if self._assign(trial, slot) and (solution := self._search(trial)) is not None:
+                return solution
+
+            if self._out_of_nodes():
+                return None
+
+        return None
+
+    def solve(self) -> Optional[list[str]]:
+        domains: list[int] = self._domains.copy()
+        if not self._propagate(domains, list(range(len(self._slots)))):
+            return None
+
+        # restart with a growing node budget, the dead end weights carry over so each run starts somewhere harder
+        restart: int = FIRST_RESTART
+        solution: Optional[list[int]] = None
+        while solution is None and not self.gave_up:
+            self._node_limit = min(self._nodes + restart, self._max_nodes)
+            solution = self._search(domains)
+            if solution is None and not self._out_of_nodes():
+                return None
+
+            restart *= 2
+
+        if solution is None:
+            return None
+
+        grid: list[str] = [VOID_CELL if cell == VOID_CELL else EMPTY_CELL for cell in self._puzzle.answers.completed]
+        for slot, bits in zip(self._slots, solution):
+            entry: Entry = self._index.decode(len(slot.cells), bits)[0]
+            for cell, letter in zip(slot.cells, entry):
+                grid[cell] = letter
+
+        return grid
+
+
+def solve_puzzle(puzzle: Puzzle, index: WordIndex, exclude: Iterable[Entry] = (),
+                 max_nodes: int = MAX_NODES) -> SolveResult:
+    start: float = time.perf_counter()
+    solver: Solver = Solver(puzzle, index, exclude=exclude, max_nodes=max_nodes)
+    grid: Optional[list[str]] = solver.solve()
+    elapsed: float = time.perf_counter() - start
+
+    cells: int = sum(cell != VOID_CELL for cell in puzzle.answers.completed)
+    correct: int = 0
+    if grid is not None:
+        correct = sum(cell != VOID_CELL and cell == answer for cell, answer in zip(grid, puzzle.answers.completed))
+
+    return SolveResult(puzzle.date, grid is not None, solver.gave_up, correct, cells, solver.nodes, elapsed, grid)
+
+
+def load_puzzles(source: Path) -> Iterator[Puzzle]:
+    if source.name.endswith(".pack"):
+        return packed_puzzles(source)
+
+    return source_puzzles(source)
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="solve every puzzle from a word list built over the corpus")
+    parser.add_argument("source", nargs="?", default=DATA_PATH, help="puzzle pack or any corpus source: directory, archive or jsonl")
+    parser.add_argument("--exclude-self", action="store_true",
+                        help="leave out words that only appear in the puzzle being solved")
+    parser.add_argument("--max-nodes", type=int, default=MAX_NODES)
+    parser.add_argument("--grid", action="store_true", help="include the filled grid in the output")
+    args: Namespace = parser.parse_args()
+
+    start: float = time.perf_counter()
+    corpus: list[Puzzle] = list(load_puzzles(Path(args.source)))
+    index: WordIndex = WordIndex(corpus_entries(corpus))
+    print(f"indexed {len(index)} words from {len(corpus)} puzzles in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+
+    solved: int = 0
+    total: float = 0
+    for puzzle in corpus:
+        exclude: list[Entry] = []
+        if args.exclude_self:
+            own: Counter[Entry] = Counter(puzzle_entries(puzzle))
+            exclude = [entry for entry, count in own.items() if index.frequency(entry) <= count]
+
+        result: SolveResult = solve_puzzle(puzzle, index, exclude, args.max_nodes)
+        solved += result.solved
+        total += result.elapsed
+
+        output: dict[str, Any] = result._asdict()
+        if not args.grid:
+            del output["grid"]
+
+        sys.stdout.write(json.dumps(output) + "\n")
+
+    print(f"solved {solved}/{len(corpus)} puzzles in {total:.2f}s, {total / max(len(corpus), 1) * 1000:.1f} ms/puzzle",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from config import DATA_PATH
+from puzzle_reader import Puzzle, VOID_CELL, create_puzzle, puzzle_files
+
+
+def _span_errors(direction: str, answers: dict[int, str], spans: dict[int, list[int]], grid: list[str]) -> list[str]:
+    errors: list[str] = []
+    for id_, answer in answers.items():
+        cells: Optional[list[int]] = spans.get(id_)
+        if cells is None:
+            errors.append(f"{direction} {id_} has no cells")
+            continue
+
+        filled: str = "".join(grid[index] for index in cells)
+        if filled != answer:
+            errors.append(f"{direction} {id_} grid reads {filled!r} but answer is {answer!r}")
+
+    for id_ in spans.keys() - answers.keys():
+        errors.append(f"{direction} {id_} covers cells but has no clue")
+
+    return errors
+
+
+def check_puzzle(puzzle_data: dict[str, Any]) -> list[str]:
+    errors: list[str] = []
+    for direction in ("across", "down"):
+        clue_count: int = len(puzzle_data["clues"][direction])
+        answer_count: int = len(puzzle_data["answers"][direction])
+        if clue_count != answer_count:
+            errors.append(f"{clue_count} {direction} clues but {answer_count} {direction} answers")
+
+    size: int = int(puzzle_data["size"]["rows"]) * int(puzzle_data["size"]["cols"])
+    for field in ("grid", "gridnums"):
+        if len(puzzle_data[field]) != size:
+            errors.append(f"{field} has {len(puzzle_data[field])} cells but the puzzle has {size}")
+
+    if errors:
+        return errors
+
+    puzzle: Optional[Puzzle] = create_puzzle(puzzle_data)
+    if puzzle is None:
+        return ["across and down spans do not cover every cell"]
+
+    across_spans: dict[int, list[int]] = {}
+    down_spans: dict[int, list[int]] = {}
+    for index, cell in enumerate(puzzle.answers.completed):
+        if cell == VOID_CELL:
+            continue
+
+        across_spans.setdefault(puzzle.clues.by_index[index].across, []).append(index)
+        down_spans.setdefault(puzzle.clues.by_index[index].down, []).append(index)
+
+    for direction, spans in (("across", across_spans), ("down", down_spans)):
+        for id_, cells in spans.items():
+            if puzzle.clues.grid[cells[0]] != id_:
+                errors.append(f"{direction} {id_} does not start on gridnum {id_}")
+
+    errors.extend(_span_errors("across", puzzle.answers.across, across_spans, puzzle.answers.completed))
+    errors.extend(_span_errors("down", puzzle.answers.down, down_spans, puzzle.answers.completed))
+    return errors
+
+
+def validate_file(path: Path) -> dict[str, Any]:
+    result: dict[str, Any] = {"file": path.as_posix(), "bytes": path.stat().st_size}
+    try:
+        with open(path.absolute(), "r") as puzzle_file:
+            puzzle_data: dict[str, Any] = json.load(puzzle_file)
+
+        errors: list[str] = check_puzzle(puzzle_data)
+
+    except (ValueError, KeyError, TypeError, AssertionError) as error:
+        errors = [f"{type(error).__name__}: {error}"]
+
+    result["ok"] = not errors
+    result["errors"] = errors
+    return result
+
+
+def main() -> None:
+    parser: ArgumentParser = ArgumentParser(description="validate every puzzle file in a data directory")
+    parser.add_argument("source", nargs="?", default=DATA_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--failures-only", action="store_true")
+    args: Namespace = parser.parse_args()
+
+    files: list[Path] = sorted(puzzle_files(Path(args.source)))
+    # large chunks keep the per-task pickling overhead small next to the parsing work
+    chunk_size: int = max(1, len(files) // (args.workers * 8))
+
+    start: float = time.perf_counter()
+    total_bytes: int = 0
+    failures: int = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for result in executor.map(validate_file, files, chunksize=chunk_size):
+            total_bytes += result["bytes"]
+            failures += not result["ok"]
+            if result["ok"] and args.failures_only:
+                continue
+
+            sys.stdout.write(json.dumps(result) + "\n")
+
+    elapsed: float = max(time.perf_counter() - start, sys.float_info.epsilon)
+    print(
+        f"validated {len(files)} files ({failures} failed) in {elapsed:.2f}s: "
+        f"{len(files) / elapsed:.1f} files/s, {total_bytes / elapsed / 1_000_000:.2f} MB/s",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
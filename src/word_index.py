@@ -0,0 +1,86 @@
+from collections import Counter
+from itertools import chain
+from typing import Iterable, Iterator, Sequence
+
+from puzzle_reader import EMPTY_CELL, Puzzle
+
+# a word is stored cell by cell so rebus squares stay a single position
+Entry = tuple[str, ...]
+
+
+def puzzle_entries(puzzle: Puzzle) -> Iterator[Entry]:
+    completed: list[str] = puzzle.answers.completed
+    for cells in chain(puzzle.clues.by_index.across_cells.values(), puzzle.clues.by_index.down_cells.values()):
+        yield tuple(completed[index] for index in cells)
+
+
+def corpus_entries(puzzles: Iterable[Puzzle]) -> Counter[Entry]:
+    frequencies: Counter[Entry] = Counter()
+    for puzzle in puzzles:
+        frequencies.update(puzzle_entries(puzzle))
+
+    return frequencies
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    while bits:
+        low: int = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class WordIndex:
+
+    def __init__(self, frequencies: dict[Entry, int]) -> None:
+        self._frequencies: dict[Entry, int] = dict(frequencies)
+        self._words: dict[int, list[Entry]] = {}
+        self._bits: dict[Entry, int] = {}
+        # (length, position) -> cell value -> bitset of the words of that length holding the value there
+        self._letters: dict[tuple[int, int], dict[str, int]] = {}
+
+        # most frequent first, so walking a bitset from the low end tries the likeliest words first
+        for entry in sorted(self._frequencies, key=lambda word: (-self._frequencies[word], word)):
+            words: list[Entry] = self._words.setdefault(len(entry), [])
+            bit: int = 1 << len(words)
+            words.append(entry)
+            self._bits[entry] = bit
+            for position, letter in enumerate(entry):
+                letters: dict[str, int] = self._letters.setdefault((len(entry), position), {})
+                letters[letter] = letters.get(letter, 0) | bit
+
+    def __len__(self) -> int:
+        return len(self._frequencies)
+
+    def __contains__(self, entry: Entry) -> bool:
+        return entry in self._frequencies
+
+    def frequency(self, entry: Entry) -> int:
+        return self._frequencies.get(entry, 0)
+
+    def all(self, length: int) -> int:
+        return (1 << len(self._words.get(length, []))) - 1
+
+    def bit(self, entry: Entry) -> int:
+        return self._bits.get(entry, 0)
+
+    def letters(self, length: int, position: int) -> dict[str, int]:
+        return self._letters.get((length, position), {})
+
+    def match(self, pattern: Sequence[str]) -> int:
+        bits: int = self.all(len(pattern))
+        for position, letter in enumerate(pattern):
+            if letter == EMPTY_CELL:
+                continue
+
+            bits &= self.letters(len(pattern), position).get(letter, 0)
+            if not bits:
+                break
+
+        return bits
+
+    def decode(self, length: int, bits: int) -> list[Entry]:
+        words: list[Entry] = self._words.get(length, [])
+        return [words[position] for position in iter_bits(bits)]
+
+    def matches(self, pattern: Sequence[str]) -> list[Entry]:
+        return self.decode(len(pattern), self.match(pattern))